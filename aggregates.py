@@ -0,0 +1,428 @@
+"""Aggregate index over the runs table.
+
+Every per-day, per-player and per-achievement number the dashboard shows is
+computed here once per data version. Sections then look their numbers up by day
+instead of re-filtering the full frame with boolean masks on every rerun.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from filters import FilterIndex
+from loader import ACHIEVEMENT_MASK, DURATION, achievement_flags, achievement_names
+from lod import bin_size, range_label
+from models import AchievementTiming
+from survival import cumulative_hazards, kaplan_meier, survival_at
+
+
+# How each additive table is combined when runs are appended; means, the
+# per-day achievement bitmask and similar values are derived afterwards
+_MERGE_RULES = {
+    'by_day': {
+        'Runs': 'sum',
+        'Total Duration': 'sum',
+        'Max Duration': 'max',
+        'Milestone Achievements': 'sum',
+        'No Milestone Runs': 'sum',
+        'Last Position': 'max',
+    },
+    'achievement_counts': 'sum',
+    'achievement_durations': 'sum',
+    'by_day_player': 'sum',
+    'death_counts': 'sum',
+    'cause_counts': {'Deaths': 'sum', 'First Position': 'min'},
+    'duration_exits': 'sum',
+    'player_deaths': 'sum',
+    'cause_deaths': 'sum',
+}
+
+# Filtered indexes kept per index, most recently used last
+MAX_SELECTIONS = 8
+
+# Set on published indexes by LiveDataset; selections inherit them
+_PUBLISHED_ATTRIBUTES = ('version', 'fingerprint', 'problems', 'built_at')
+
+
+def _day_rows(days, offset):
+    """Row positions per day; a contiguous block becomes a slice so that
+    selecting a day is a view rather than a scan of the whole frame"""
+    day_rows = {}
+    for day_value, rows in days.groupby(days).indices.items():
+        rows = rows + offset
+        if rows[-1] - rows[0] + 1 == len(rows):
+            rows = slice(int(rows[0]), int(rows[-1]) + 1)
+        day_rows[int(day_value)] = rows
+    return day_rows
+
+
+def _as_positions(rows):
+    if isinstance(rows, slice):
+        return np.arange(rows.start, rows.stop)
+    return rows
+
+
+def _merge_day_rows(old, new):
+    merged = dict(old)
+    for day, rows in new.items():
+        if day not in merged:
+            merged[day] = rows
+        elif isinstance(merged[day], slice) and isinstance(rows, slice) and merged[day].stop == rows.start:
+            merged[day] = slice(merged[day].start, rows.stop)
+        else:
+            merged[day] = np.concatenate([_as_positions(merged[day]), _as_positions(rows)])
+    return merged
+
+
+def _aggregate(runs, offset):
+    """Additive groupby tables for `runs`, whose first row sits at position `offset`"""
+    day = runs['Day']
+    # Durations are stored as float32; totals are accumulated in float64
+    durations = runs[DURATION].astype(np.float64)
+    masks = runs[ACHIEVEMENT_MASK]
+    reached = achievement_flags(runs)
+    positions = pd.Series(np.arange(offset, offset + len(runs)), index=runs.index)
+    milestones = pd.Series(np.bitwise_count(masks.to_numpy()).astype(np.int64), index=runs.index)
+
+    # Player and cause are categoricals: only combinations that occur are kept
+    by_day_player = durations.groupby([day, runs['Player Death']], observed=True).agg(['size', 'sum'])
+    by_day_player.columns = ['Runs', 'Total Duration']
+    cause_counts = positions.groupby([day, runs['Cause of Death']], observed=True).agg(['size', 'min'])
+    cause_counts.columns = ['Deaths', 'First Position']
+
+    # Survival: runs leaving the risk set per (day, duration), and which of
+    # those exits were deaths; a run without a recorded cause is censored
+    duration = durations.rename('Duration')
+    died = runs['Cause of Death'].notna()
+    duration_exits = pd.DataFrame({
+        'Exits': duration.groupby([day, duration]).size(),
+        'Deaths': died.groupby([day, duration]).sum(),
+    })
+
+    return {
+        # Per-day totals
+        'by_day': pd.DataFrame({
+            'Runs': durations.groupby(day).size(),
+            'Total Duration': durations.groupby(day).sum(),
+            'Max Duration': durations.groupby(day).max(),
+            'Milestone Achievements': milestones.groupby(day).sum(),
+            'No Milestone Runs': (masks == 0).groupby(day).sum(),
+            'Last Position': positions.groupby(day).max(),
+        }),
+        # Per-day, per-achievement completion counts and summed durations
+        'achievement_counts': reached.groupby(day).sum(),
+        'achievement_durations': reached.mul(durations, axis=0).groupby(day).sum(),
+        # Per-day, per-player time lost
+        'by_day_player': by_day_player,
+        # Per-day death counts by player and cause; NaN keys are kept so cause
+        # totals still count runs without a recorded player
+        'death_counts': durations.groupby(
+            [day, runs['Player Death'], runs['Cause of Death']], dropna=False, observed=True
+        ).size(),
+        'cause_counts': cause_counts,
+        # Per-day exits by duration, and deaths by duration per player and cause
+        'duration_exits': duration_exits,
+        'player_deaths': duration.groupby([day, runs['Player Death'], duration], observed=True).size(),
+        'cause_deaths': duration.groupby([day, runs['Cause of Death'], duration], observed=True).size(),
+    }
+
+
+def _merge(old, new, rule):
+    levels = list(range(old.index.nlevels))
+    return pd.concat([old, new]).groupby(level=levels, dropna=False, observed=True).agg(rule)
+
+
+class StatsIndex:
+    """Groupby indexes over the runs table.
+
+    Lookups take a `day` argument; None means all days. An index is never
+    modified once built: appending runs produces a new index, so sessions
+    still reading the old one are unaffected.
+    """
+
+    def __init__(self, runs):
+        self._set(runs, _day_rows(runs['Day'], 0), _aggregate(runs, 0))
+
+    @classmethod
+    def _from_parts(cls, runs, day_rows, tables):
+        index = cls.__new__(cls)
+        index._set(runs, day_rows, tables)
+        return index
+
+    def _set(self, runs, day_rows, tables):
+        self.runs = runs
+        self.achievements = achievement_names(runs)
+        self._day_rows = day_rows
+        self._sort_orders = {}
+        self._timing = None
+        self._survival = {}
+        self._filter_index = None
+        self._selections = OrderedDict()
+        self._selections_lock = threading.Lock()
+        # The RunFilter this index was selected with, if any
+        self.run_filter = None
+        self.days = sorted(day_rows)
+        for name, table in tables.items():
+            setattr(self, name, table)
+
+        # Derived values: union of the run bitmasks, bit i set when any run
+        # that day reached achievement i
+        bits = np.left_shift(1, np.arange(len(self.achievements)), dtype=np.int64)
+        self.by_day['Achievement Mask'] = (self.achievement_counts.to_numpy() > 0).astype(np.int64) @ bits
+
+    def appended(self, runs):
+        """Index for `runs`, a table that extends this index's runs with new trailing rows.
+
+        Only the new rows are aggregated; the existing tables are merged with
+        theirs, so the cost is proportional to the appended data.
+        """
+        offset = len(self.runs)
+        new_runs = runs.iloc[offset:]
+        if len(new_runs) == 0:
+            return StatsIndex._from_parts(runs, self._day_rows, self._tables())
+        new_tables = _aggregate(new_runs, offset)
+        tables = {
+            name: _merge(table, new_tables[name], _MERGE_RULES[name])
+            for name, table in self._tables().items()
+        }
+        day_rows = _merge_day_rows(self._day_rows, _day_rows(new_runs['Day'], offset))
+        return StatsIndex._from_parts(runs, day_rows, tables)
+
+    def _tables(self):
+        tables = {name: getattr(self, name) for name in _MERGE_RULES}
+        tables['by_day'] = tables['by_day'].drop(columns='Achievement Mask')
+        return tables
+
+    # ---------- row access ----------
+
+    def day_runs(self, day=None):
+        """Rows of the runs table for one day (a view when the day is contiguous)"""
+        if day is None:
+            return self.runs
+        rows = self._day_rows.get(day)
+        if rows is None:
+            return self.runs.iloc[0:0]
+        return self.runs.iloc[rows]
+
+    def _sort_order(self, column):
+        """(positions of present values in ascending order, positions of missing
+        values) over the whole table, computed once per column"""
+        order = self._sort_orders.get(column)
+        if order is None:
+            if column in self.achievements:
+                bit = self.achievements.index(column)
+                values = (self.runs[ACHIEVEMENT_MASK].to_numpy() >> bit) & 1
+                missing = np.zeros(len(values), dtype=bool)
+            else:
+                values = self.runs[column].to_numpy()
+                missing = pd.isna(values)
+            present = np.flatnonzero(~missing)
+            order = (present[np.argsort(values[present], kind='stable')], np.flatnonzero(missing))
+            self._sort_orders[column] = order
+        return order
+
+    def sorted_rows(self, day=None, sort_by=None, descending=False):
+        """Row positions for one day in display order, missing values last.
+
+        The whole-table order for each column is built once and then narrowed
+        to the day's rows, so sorting never copies the runs table.
+        """
+        if sort_by is None:
+            rows = self._day_rows.get(day, slice(0, 0)) if day is not None else slice(0, len(self.runs))
+            rows = _as_positions(rows)
+            return rows[::-1] if descending else rows
+
+        present, missing = self._sort_order(sort_by)
+        if descending:
+            present = present[::-1]
+        order = np.concatenate([present, missing])
+        if day is None:
+            return order
+        rows = self._day_rows.get(day)
+        if rows is None:
+            return order[:0]
+        if isinstance(rows, slice):
+            return order[(order >= rows.start) & (order < rows.stop)]
+        return order[np.isin(order, rows)]
+
+    # ---------- filtering ----------
+
+    def filter_index(self):
+        """Bitmaps and sort orders for resolving RunFilters, built on first use"""
+        if self._filter_index is None:
+            self._filter_index = FilterIndex(self.runs, self.achievements)
+        return self._filter_index
+
+    def select(self, run_filter):
+        """Index over just the runs matching `run_filter` (self for an empty filter).
+
+        Its fingerprint extends this index's with the filter, so figures built
+        from it are cached separately; the last MAX_SELECTIONS are kept.
+        """
+        if not run_filter:
+            return self
+        key = run_filter.key()
+        with self._selections_lock:
+            selection = self._selections.get(key)
+            if selection is not None:
+                self._selections.move_to_end(key)
+                return selection
+
+        # Built outside the lock; sessions asking for other filters go ahead
+        rows = self.filter_index().positions(run_filter)
+        runs = self.runs.iloc[rows].reset_index(drop=True)
+        selection = StatsIndex(runs)
+        selection.run_filter = run_filter
+        for name in _PUBLISHED_ATTRIBUTES:
+            if hasattr(self, name):
+                setattr(selection, name, getattr(self, name))
+        if hasattr(self, 'fingerprint'):
+            selection.fingerprint = self.fingerprint + (key,)
+        with self._selections_lock:
+            selection = self._selections.setdefault(key, selection)
+            self._selections.move_to_end(key)
+            while len(self._selections) > MAX_SELECTIONS:
+                self._selections.popitem(last=False)
+        return selection
+
+    # ---------- lookups ----------
+
+    def _day_table(self, table, day):
+        """Select one day from a Day-indexed table, or sum it over all days.
+
+        Sparse tables have no rows for a day nothing was counted on (say, no
+        recorded deaths); that day gets an empty table, or zeros.
+        """
+        multi = isinstance(table.index, pd.MultiIndex)
+        if day is None:
+            if multi:
+                return table.groupby(level=list(range(1, table.index.nlevels)), dropna=False, observed=True).sum()
+            return table.sum()
+        if multi:
+            try:
+                return table.xs(day, level=0)
+            except KeyError:
+                return table.iloc[0:0].droplevel(0)
+        if day not in table.index:
+            return table.iloc[0:0].sum()
+        return table.loc[day]
+
+    def summary(self, day=None):
+        """Headline numbers for the summary metrics"""
+        totals = self._day_table(self.by_day, day)
+        runs = int(totals['Runs'])
+        if day is None:
+            max_duration = self.by_day['Max Duration'].max()
+            last_run = self.runs.iloc[-1]
+            causes = self.cause_counts.groupby(level=1, observed=True).agg({'Deaths': 'sum', 'First Position': 'min'})
+        else:
+            max_duration = totals['Max Duration']
+            last_run = self.runs.iloc[int(totals['Last Position'])]
+            causes = self._day_table(self.cause_counts, day)
+        # Most deaths first; ties go to the cause seen first, as value_counts does
+        causes = causes.sort_values(['Deaths', 'First Position'], ascending=[False, True])
+
+        return {
+            'runs': runs,
+            'total_duration': totals['Total Duration'],
+            'avg_duration': totals['Total Duration'] / runs,
+            'max_duration': max_duration,
+            'final_run': last_run['Run'],
+            'final_run_duration': last_run[DURATION],
+            'most_common_death': causes.index[0] if len(causes) else None,
+            'most_common_death_count': int(causes['Deaths'].iloc[0]) if len(causes) else 0,
+            'no_milestone_runs': int(totals['No Milestone Runs']),
+            'players': len(self._day_table(self.by_day_player, day)),
+        }
+
+    def deaths(self, day=None):
+        """Death counts per (player, cause), like groupby(...).size().reset_index()"""
+        counts = self._day_table(self.death_counts, day)
+        counts = counts[counts > 0]
+        counts = counts[counts.index.get_level_values(0).notna() & counts.index.get_level_values(1).notna()]
+        return counts.rename('Deaths').reset_index()
+
+    def time_lost(self, day=None):
+        """Total minutes lost per player, ascending"""
+        return self._day_table(self.by_day_player, day)['Total Duration'].sort_values(ascending=True)
+
+    def achievement_stats(self, day=None):
+        """Completion count and mean run duration per achievement, in milestone order"""
+        counts = self._day_table(self.achievement_counts, day)
+        durations = self._day_table(self.achievement_durations, day)
+        return pd.DataFrame({
+            'Count': counts.astype(int),
+            'Avg Duration': (durations / counts).where(counts > 0),
+        })
+
+    def timing(self):
+        """Achievement timing model for this index, built on first use"""
+        if self._timing is None:
+            self._timing = AchievementTiming(self.runs, self.achievements)
+        return self._timing
+
+    # ---------- survival ----------
+
+    def survival(self, day=None, player=None):
+        """Kaplan–Meier curve of run duration for one stratum, built once per index.
+
+        With a `player`, only that player's deaths count as events; runs that
+        ended with somebody else's death are censored at their duration.
+        """
+        key = ('survival', day, player)
+        curve = self._survival.get(key)
+        if curve is None:
+            exits = self._day_table(self.duration_exits, day)
+            if player is None:
+                deaths = exits['Deaths']
+            else:
+                deaths = self._day_table(self.player_deaths, day)
+                if player in deaths.index.get_level_values(0):
+                    deaths = deaths.xs(player, level=0)
+                else:
+                    deaths = deaths.iloc[0:0].droplevel(0)
+            curve = kaplan_meier(exits['Exits'], deaths)
+            self._survival[key] = curve
+        return curve
+
+    def survival_probability(self, minutes, day=None, player=None):
+        """Probability that a run lasts longer than `minutes`"""
+        return float(survival_at(self.survival(day, player), minutes))
+
+    def cause_hazards(self, day=None):
+        """Nelson–Aalen cumulative hazard of each cause of death, by duration"""
+        key = ('hazards', day)
+        hazards = self._survival.get(key)
+        if hazards is None:
+            exits = self._day_table(self.duration_exits, day)
+            hazards = cumulative_hazards(exits['Exits'], self._day_table(self.cause_deaths, day))
+            self._survival[key] = hazards
+        return hazards
+
+    def trends(self, max_points=None):
+        """Per-day trend metrics for the 'Performance Trends Across Days' charts.
+
+        With `max_points`, runs of consecutive days are binned so there are at
+        most that many rows; a bin's Day is its first day and Label names the
+        range it covers.
+        """
+        by_day = self.by_day
+        days = by_day.index.to_numpy()
+        size = 1 if max_points is None else int(bin_size(len(days), max_points))
+        starts = np.arange(0, len(days), size)
+        ends = np.minimum(starts + size, len(days)) - 1
+
+        def combine(column, ufunc):
+            return ufunc.reduceat(by_day[column].to_numpy(), starts)
+
+        runs = combine('Runs', np.add)
+        masks = combine('Achievement Mask', np.bitwise_or)
+        return pd.DataFrame({
+            'Day': days[starts],
+            'Label': [range_label(days[first], days[last], 'Day', 'Days') for first, last in zip(starts, ends)],
+            'Avg Duration': combine('Total Duration', np.add) / runs,
+            'Max Duration': combine('Max Duration', np.maximum),
+            'Avg Milestone Achievements': combine('Milestone Achievements', np.add) / runs,
+            'Furthest Milestone Achievement': [int(mask).bit_length() for mask in masks],
+        })
@@ -0,0 +1,251 @@
+"""Read-only HTTP API over the computed stats.
+
+Serves the same numbers as the dashboard, from the same Arrow caches and
+StatsIndex, for overlays, bots and other tools that would otherwise scrape the
+page or parse stats.ods themselves:
+
+    python api.py --port 8001
+
+    GET /api/partitions                  seasons and sheets
+    GET /api/summary?day=3               summary metrics
+    GET /api/deaths?player=Neuro         deaths per (player, cause)
+    GET /api/trends?points=100           per-day trends, binned to `points`
+    GET /api/achievements?day=3          completion count and rate per achievement
+
+Every stats endpoint takes `season` and `sheet` (default: the first
+partition) and `day` (default: all days). Responses are JSON, or an Arrow IPC
+stream with `format=arrow` or `Accept: application/vnd.apache.arrow.stream`.
+
+Each response carries an ETag derived from the data fingerprint and the
+request, so a client polling with If-None-Match gets a 304 without any work
+being done; bodies are built once per data version and kept in an LRU cache
+shared by every client. Like the dashboard, the API keeps serving the last
+published version while a changed file is being loaded.
+"""
+import argparse
+import functools
+import hashlib
+import http.server
+import json
+import logging
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import pyarrow as pa
+
+from dataset import PartitionedDataset
+from lod import MAX_TREND_POINTS
+from lru import SizedLRU
+
+logger = logging.getLogger(__name__)
+
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+JSON_TYPE = 'application/json'
+# Bytes of response bodies kept across all endpoints and data versions
+RESPONSE_CACHE_BYTES = 16 * 1024 * 1024
+
+
+class QueryError(Exception):
+    """A request the API can't answer; carries the HTTP status to reply with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _day(params):
+    value = params.get('day')
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(400, f"day must be a whole number, got '{value}'") from None
+
+
+def query_summary(stats, params):
+    """Summary metrics as a one-row table"""
+    return pd.DataFrame([stats.summary(_day(params))]), True
+
+
+def query_deaths(stats, params):
+    """Deaths per (player, cause), optionally for one player"""
+    deaths = stats.deaths(_day(params))
+    player = params.get('player')
+    if player is not None:
+        deaths = deaths[deaths['Player Death'] == player]
+    return deaths.reset_index(drop=True), False
+
+
+def query_trends(stats, params):
+    """Per-day trend metrics, binned to at most `points` rows"""
+    try:
+        points = int(params.get('points', MAX_TREND_POINTS))
+    except ValueError:
+        raise QueryError(400, "points must be a whole number") from None
+    if points < 1:
+        raise QueryError(400, "points must be at least 1")
+    return stats.trends(points), False
+
+
+def query_achievements(stats, params):
+    """Completion count, rate among runs and mean run duration per achievement"""
+    day = _day(params)
+    achievements = stats.achievement_stats(day)
+    achievements['Rate'] = achievements['Count'] / stats.summary(day)['runs']
+    return achievements.rename_axis('Achievement').reset_index(), False
+
+
+# Stats endpoints: query(stats, params) -> (table, single row?)
+QUERIES = {
+    'summary': query_summary,
+    'deaths': query_deaths,
+    'trends': query_trends,
+    'achievements': query_achievements,
+}
+
+
+def to_json(table, single, meta):
+    """JSON body: `meta` plus the table as records (one object if `single`)"""
+    records = table.to_json(orient='records', date_format='iso')
+    if single:
+        records = records[1:-1]
+    fields = json.dumps(meta)[1:-1]
+    return ('{' + fields + (', ' if fields else '') + '"data": ' + records + '}').encode('utf-8')
+
+
+def to_arrow(table, meta):
+    """Arrow IPC stream body; `meta` goes into the schema metadata"""
+    arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+    arrow_table = arrow_table.replace_schema_metadata(
+        {**(arrow_table.schema.metadata or {}), b'stats': json.dumps(meta).encode('utf-8')}
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    return sink.getvalue().to_pybytes()
+
+
+class QueryAPI:
+    """Answers API requests from a PartitionedDataset, with an LRU cache of
+    response bodies keyed on (data fingerprint, endpoint, parameters, format)"""
+
+    def __init__(self, dataset, max_bytes=RESPONSE_CACHE_BYTES):
+        self.dataset = dataset
+        self.cache = SizedLRU(max_bytes)
+
+    def _partition(self, params):
+        partitions = self.dataset.partitions()
+        if not partitions:
+            raise QueryError(404, "No stats files found")
+        season = params.get('season', partitions[0][0])
+        sheet = params.get('sheet')
+        matches = [p for p in partitions if p[0] == season and sheet in (None, p[1])]
+        if not matches:
+            raise QueryError(404, f"No partition for season '{season}'" + (f", sheet '{sheet}'" if sheet else ''))
+        return matches[0]
+
+    def respond(self, endpoint, params, arrow=False, etag=None):
+        """(status, content type, ETag, body) for one request.
+
+        `etag` is the client's If-None-Match; if it still matches, the reply is
+        a bodiless 304.
+        """
+        if endpoint == 'partitions':
+            partitions = pd.DataFrame(self.dataset.partitions(), columns=['Season', 'Sheet'])
+            return self._build(('partitions', tuple(partitions.itertuples(index=False)), arrow), etag,
+                               lambda: (partitions, False, {}), arrow)
+
+        query = QUERIES.get(endpoint)
+        if query is None:
+            raise QueryError(404, f"Unknown endpoint '{endpoint}'")
+        season, sheet = self._partition(params)
+        stats = self.dataset.get(season, sheet).current()
+        day = _day(params)
+        if day is not None and day not in stats.days:
+            raise QueryError(404, f"No runs on day {day}")
+        meta = {'season': season, 'sheet': sheet, 'day': day, 'version': stats.version}
+        key = (stats.fingerprint, endpoint, tuple(sorted(params.items())), arrow)
+        return self._build(key, etag, lambda: query(stats, params) + (meta,), arrow)
+
+    def _build(self, key, etag, build, arrow):
+        tag = '"' + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20] + '"'
+        content_type = ARROW_TYPE if arrow else JSON_TYPE
+        if etag is not None and tag in {value.strip() for value in etag.split(',')}:
+            return 304, content_type, tag, b''
+
+        def build_body():
+            table, single, meta = build()
+            return to_arrow(table, meta) if arrow else to_json(table, single, meta)
+
+        body = self.cache.get_or_build(key, build_body)
+        return 200, content_type, tag, body
+
+
+class APIRequestHandler(http.server.BaseHTTPRequestHandler):
+    """GET/HEAD /api/<endpoint> against a QueryAPI"""
+
+    def __init__(self, *args, api, **kwargs):
+        self.api = api
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self._reply(send_body=True)
+
+    def do_HEAD(self):
+        self._reply(send_body=False)
+
+    def _reply(self, send_body):
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        arrow = params.pop('format', None) == 'arrow' or ARROW_TYPE in self.headers.get('Accept', '')
+        try:
+            if not url.path.startswith('/api/'):
+                raise QueryError(404, "Endpoints live under /api/")
+            status, content_type, tag, body = self.api.respond(
+                url.path[len('/api/'):].strip('/'), params, arrow, self.headers.get('If-None-Match')
+            )
+        except QueryError as exc:
+            status, content_type, tag = exc.status, JSON_TYPE, None
+            body = json.dumps({'error': str(exc)}).encode('utf-8')
+        except Exception:
+            logger.exception("API request %s failed", self.path)
+            status, content_type, tag = 500, JSON_TYPE, None
+            body = json.dumps({'error': "Internal error while answering the request"}).encode('utf-8')
+
+        self.send_response(status)
+        if tag is not None:
+            self.send_header('ETag', tag)
+            # Cache, but check back every time; an unchanged ETag costs a 304
+            self.send_header('Cache-Control', 'no-cache')
+            # JSON or Arrow depends on the Accept header as well as the URL
+            self.send_header('Vary', 'Accept')
+        if status != 304:
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body and status != 304:
+            self.wfile.write(body)
+
+
+def make_server(dataset, host='127.0.0.1', port=8001):
+    """ThreadingHTTPServer answering API requests from `dataset`"""
+    handler = functools.partial(APIRequestHandler, api=QueryAPI(dataset))
+    return http.server.ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the computed stats as a read-only JSON/Arrow API")
+    parser.add_argument('--data', default='*.ods', help="stats files to serve (default: *.ods)")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="address to bind (default: 127.0.0.1; 0.0.0.0 for every interface)")
+    parser.add_argument('--port', type=int, default=8001, help="port to listen on (default: 8001)")
+    args = parser.parse_args()
+
+    with make_server(PartitionedDataset(args.data), args.host, args.port) as server:
+        print(f"Serving the stats API at http://{args.host or 'localhost'}:{args.port}/api/summary")
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
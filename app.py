@@ -1,6 +1,29 @@
+import json
+import time
+import uuid
+
+# Module imports are most of a cold start; timed here and shown in the debug panel.
+# Only the process's first run pays for them, see cold_start_import_seconds()
+_imports_started = time.perf_counter()
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
+
+from charts import build_season_comparison
+from dataset import PartitionedDataset
+from figure_cache import FigureCache
+from filters import RunFilter
+from loader import achievement_flags
+from lod import AGGREGATED_SEGMENTS, MAX_DRILLDOWN_SEGMENTS
+from profiling import SectionProfiler
+from sessions import SessionBudget
+
+IMPORT_SECONDS = time.perf_counter() - _imports_started
+
+# Sessions share one runs table and slice day views out of it; copy-on-write
+# makes any write to such a view copy it instead of changing everyone's data
+pd.set_option("mode.copy_on_write", True)
 
 # Set page config
 st.set_page_config(
@@ -13,19 +36,177 @@ st.set_page_config(
 st.markdown("<h1 style='text-align: center;'>Neuro Hardcore Minecraft Stats</h1>", unsafe_allow_html=True)
 
 # Load data
-@st.cache_data
+# How often each open page checks whether the watcher has published new data
+LIVE_REFRESH_SECONDS = 2
+
+# Every sheet of every stats file next to the app is a (season, sheet) partition
+DATA_FILES = '*.ods'
+DEFAULT_SEASON = 'stats'
+
+@st.cache_resource
 def load_data():
-    """Load the stats.ods file"""
-    data = pd.read_excel('stats.ods', engine='odf')
-    return data
+    """Shared live views of the stats files, one per (season, sheet) partition.
+
+    A partition is loaded and indexed the first time someone opens it, then
+    extended as runs are appended; a background watcher refreshes it when its
+    file is saved. Sessions keep seeing the previous version until the new
+    one, with its main figures already built, is swapped in. The indexes it
+    hands out are shared by every session and treated as read-only.
+    """
+    return PartitionedDataset(DATA_FILES, prepare=load_figure_cache().warm)
+
+def partition_label(partition, partitions):
+    """Season name, plus the sheet name when the season's file has several sheets"""
+    season, sheet = partition
+    if sum(1 for other, _ in partitions if other == season) > 1:
+        return f"{season} / {sheet}"
+    return season
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def rerun_on_new_data(dataset, stats):
+    """Rerun the page once the shared dataset has moved past the version it
+    shows; until then, say how fresh that version is"""
+    if dataset.version != stats.version:
+        st.rerun(scope="app")
+
+    built_at = time.strftime('%H:%M:%S', time.localtime(stats.built_at))
+    if dataset.error is not None and dataset.stale():
+        st.caption(f"⚠️ The latest changes to the stats file couldn't be loaded; showing data from {built_at}.")
+    elif dataset.refreshing() or dataset.stale():
+        st.caption(f"🔄 The stats file changed. Showing data from {built_at} while the update loads…")
+    else:
+        st.caption(f"✅ Up to date (loaded {built_at})")
+
+# Memory budget for serialized figures shared by all sessions
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+@st.cache_resource
+def load_figure_cache():
+    """Serialized figures shared by every session, keyed on data version and day filter"""
+    return FigureCache(max_bytes=FIGURE_CACHE_BYTES)
+
+# Per-session and process-wide caps on what reruns in progress materialize
+SESSION_MEMORY_BYTES = 128 * 1024 * 1024
+TOTAL_SESSION_MEMORY_BYTES = 512 * 1024 * 1024
+# Parsing a figure, Streamlit's validated copy and its re-serialized spec
+# together take about this many times the JSON size
+FIGURE_MEMORY_FACTOR = 20
+
+@st.cache_resource
+def load_session_budget():
+    """Memory accounting shared by every session"""
+    return SessionBudget(SESSION_MEMORY_BYTES, TOTAL_SESSION_MEMORY_BYTES)
+
+@st.cache_resource
+def cold_start_import_seconds():
+    """Import time measured by the process's first run; later reruns find the
+    modules already loaded and would report about 0 ms"""
+    return IMPORT_SECONDS
+
+def show_figure(stats, day, name, events=None, **options):
+    """Draw one cached chart and return its info dict (None if there was nothing to draw)"""
+    spec, info = load_figure_cache().get(stats, day, name, events, **options)
+    if spec is None:
+        return None
+    if not session_budget.charge(session_id, len(spec) * FIGURE_MEMORY_FACTOR):
+        st.warning("This chart was skipped to keep the server's memory in check. Try again in a moment.")
+        return info
+    figure = json.loads(spec)
+    profiler.add_figure(figure, len(spec))
+    st.plotly_chart(figure, use_container_width=True)
+    return info
+
+def filter_controls(stats):
+    """Run filter widgets; returns the RunFilter they describe (empty when untouched)"""
+    with st.expander("Filter runs"):
+        days = stats.days
+        day_range = None
+        if len(days) > 1:
+            first, last = st.select_slider("Days", days, value=(days[0], days[-1]), key="filter_days")
+            if (first, last) != (days[0], days[-1]):
+                day_range = (first, last)
+
+        filter_cols = st.columns(3)
+        players = filter_cols[0].multiselect(
+            "Died to player", list(stats.runs['Player Death'].cat.categories), key="filter_players"
+        )
+        causes = filter_cols[1].multiselect(
+            "Cause of death", list(stats.runs['Cause of Death'].cat.categories), key="filter_causes"
+        )
+        achievements = filter_cols[2].multiselect("Reached all of", stats.achievements, key="filter_achievements")
+
+        longest = float(np.ceil(stats.by_day['Max Duration'].max()))
+        low, high = st.slider("Run duration (minutes)", 0.0, longest, (0.0, longest), step=1.0, key="filter_duration")
+        duration = None if (low, high) == (0.0, longest) else (low, high)
+
+    return RunFilter(day_range, players or None, causes or None, achievements or None, duration)
+
+# Sections of the page below the summary; only the one being viewed is computed
+SECTIONS = ["Deaths", "Time Lost", "Timeline", "Milestones", "Completion Rates", "Trends", "Survival", "Run Data"]
+
+# Page sizes offered for the Run Data table
+TABLE_PAGE_SIZES = [25, 50, 100, 250]
+
+# Identifies this browser session across its reruns
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+
+# Per-section timings for this rerun, shown in the debug panel at the bottom
+profiler = SectionProfiler(trace_memory=st.session_state.get('profile_memory', False), session=session_id)
+profiler.record("Imports (cold start)", cold_start_import_seconds())
+
+# Everything this rerun materializes is charged to the session until it ends
+session_budget = load_session_budget()
+session_budget.begin(session_id)
 
 # Load and display data
 try:
-    df = load_data()
+    profiler.start("Load data")
+    seasons = load_data()
+    partitions = seasons.partitions()
+    if not partitions:
+        raise FileNotFoundError(DATA_FILES)
+    
+    # ==================== SEASON PICKER ====================
+    # Only the chosen partition is loaded; the others stay untouched until picked
+    if len(partitions) > 1:
+        default_seasons = [idx for idx, (season, _) in enumerate(partitions) if season == DEFAULT_SEASON]
+        selected_partition = st.selectbox(
+            "Season",
+            partitions,
+            index=default_seasons[0] if default_seasons else 0,
+            format_func=lambda partition: partition_label(partition, partitions),
+            key="season"
+        )
+    else:
+        selected_partition = partitions[0]
+    dataset = seasons.get(*selected_partition)
+    stats = dataset.current()
+    # Timestamped per-run events, when the season has an event log next to it
+    events = seasons.events(selected_partition[0])
+    
+    # Rows the loader had to drop or coerce, so they can be fixed in the sheet
+    problem_count, problem_rows = stats.problems
+    if problem_count:
+        with st.expander(f"⚠️ {problem_count} problem(s) found in the stats sheet"):
+            st.caption("Rows with a missing or invalid Run, Day or duration are left out of every chart.")
+            st.dataframe(problem_rows.astype(str), hide_index=True, use_container_width=True)
+    profiler.data_version = stats.version
+    rerun_on_new_data(dataset, stats)
+    
+    # ==================== RUN FILTER ====================
+    # Resolved through the index's per-dimension bitmaps; everything below
+    # reads the filtered index exactly like the full one
+    run_filter = filter_controls(stats)
+    if run_filter:
+        stats = stats.select(run_filter)
+        if len(stats.runs) == 0:
+            st.warning("No runs match these filters.")
+            st.stop()
+        st.caption(f"Showing {len(stats.runs):,} runs that match the filters.")
     
     # ==================== DAY FILTER ====================
     st.markdown("### Filter by Day")
-    unique_days = sorted(df['Day'].unique())
+    unique_days = stats.days
     day_options = ['All Days'] + [f'Day {day}' for day in unique_days]
     selected_day_option = st.radio(
         "Select which day's data to display (affects all charts and metrics below):",
@@ -34,26 +215,27 @@ try:
         key="global_day_filter"
     )
     
-    # Filter dataframe based on selection
+    # Filter dataframe based on selection (an indexed slice, not a scan)
     if selected_day_option == 'All Days':
-        filtered_df = df
+        day_num = None
     else:
         day_num = int(selected_day_option.split(' ')[1])
-        filtered_df = df[df['Day'] == day_num]
+    summary = stats.summary(day_num)
     
     st.markdown("---")
     
     # ==================== SUMMARY STATISTICS ====================
-    # Calculate key metrics using filtered data
-    total_time = filtered_df['Approximate Duration (Minutes)'].sum()
-    avg_duration = filtered_df['Approximate Duration (Minutes)'].mean()
+    profiler.start("Summary metrics", rows=summary['runs'])
+    # Key metrics come straight from the precomputed index
+    total_time = summary['total_duration']
+    avg_duration = summary['avg_duration']
     
     # Get completion time from final entry
-    final_run_duration = filtered_df.iloc[-1]['Approximate Duration (Minutes)']
+    final_run_duration = summary['final_run_duration']
     
     # Get most common cause of death
-    most_common_death = filtered_df['Cause of Death'].value_counts().idxmax()
-    most_common_death_count = filtered_df['Cause of Death'].value_counts().max()
+    most_common_death = summary['most_common_death'] or '—'
+    most_common_death_count = summary['most_common_death_count']
     
     # Display metrics with custom HTML/CSS for centering and animation
     st.markdown(f"""
@@ -109,13 +291,13 @@ try:
                 <div class="metric-label-emoji">📊</div>
                 <div class="metric-label">Average Run Duration</div>
                 <div class="metric-value"><span class="counter" data-target="{int(avg_duration)}">{int(avg_duration)}</span> min</div>
-                <div class="metric-delta">↗ {len(filtered_df)} total runs</div>
+                <div class="metric-delta">↗ {summary['runs']} total runs</div>
             </div>
             <div class="metric-box">
                 <div class="metric-label-emoji">🚀</div>
                 <div class="metric-label">Completion Run Duration</div>
                 <div class="metric-value"><span class="counter" data-target="{int(final_run_duration)}">{int(final_run_duration)}</span> min</div>
-                <div class="metric-delta">↗ Run #{filtered_df.iloc[-1]['Run']}</div>
+                <div class="metric-delta">↗ Run #{summary['final_run']}</div>
             </div>
             <div class="metric-box">
                 <div class="metric-label-emoji">💀</div>
@@ -155,649 +337,272 @@ try:
     
     st.markdown("<br>", unsafe_allow_html=True)
     
-    # ==================== DEATH STATISTICS CHART ====================
-    st.subheader("Who Dies the Most?")
-    
-    # Prepare data for stacked bar chart using filtered data
-    death_data = filtered_df.groupby(['Player Death', 'Cause of Death']).size().reset_index(name='Deaths')
-    
-    # Get players sorted by total deaths (for Y-axis ordering)
-    player_totals = death_data.groupby('Player Death')['Deaths'].sum().sort_values(ascending=True)
-    players = player_totals.index.tolist()
-    
-    # Create figure
-    fig = go.Figure()
-    
-    # Get unique causes for color mapping
-    all_causes = death_data['Cause of Death'].unique()
-    colors = ['#8dd3c7', '#ffffb3', '#bebada', '#fb8072', '#80b1d3', '#fdb462', '#b3de69', 
-              '#fccde5', '#d9d9d9', '#bc80bd', '#ccebc5', '#ffed6f', '#e5c494', '#b3e2cd',
-              '#fdcdac', '#cbd5e8', '#f4cae4']
-    color_map = {cause: colors[i % len(colors)] for i, cause in enumerate(all_causes)}
-    
-    # For each player, sort their causes by death count (highest first) and add as traces
-    for player in players:
-        player_data = death_data[death_data['Player Death'] == player].sort_values('Deaths', ascending=False)
-        
-        # Add each cause as a segment in the bar
-        for idx, row in player_data.iterrows():
-            cause = row['Cause of Death']
-            deaths = row['Deaths']
-            
-            # Check if this cause already has a trace (for legend grouping)
-            existing_trace = any(trace.name == cause for trace in fig.data)
-            
-            fig.add_trace(go.Bar(
-                name=cause,
-                x=[deaths],
-                y=[player],
-                orientation='h',
-                marker=dict(color=color_map[cause]),
-                text=cause,
-                textposition='inside',
-                insidetextanchor='middle',
-                textfont=dict(size=20),
-                hovertemplate=f'<b>{player}</b><br>Cause: {cause}<br>Deaths: {deaths}<extra></extra>',
-                showlegend=not existing_trace,  # Only show in legend once
-                legendgroup=cause  # Group all instances of this cause
-            ))
-    
-    # Update layout
-    fig.update_layout(
-        barmode='stack',
-        height=500,
-        title='Total Deaths per Player (with Causes of Death)',
-        title_font=dict(size=16),
-        xaxis_title="Number of Deaths",
-        yaxis_title="Player",
-        font=dict(size=16),
-        xaxis=dict(title_font=dict(size=18), tickfont=dict(size=14)),
-        yaxis=dict(title_font=dict(size=18), tickfont=dict(size=16)),
-        showlegend=False,
-        hovermode='closest'
+    # ==================== SECTION PICKER ====================
+    # Only the selected section is computed and sent to the browser; figures
+    # are cached per data version, so switching back to a section is cheap
+    selected_section = st.radio(
+        "Show:",
+        SECTIONS + (["Event Times"] if events is not None and len(events) else [])
+        + (["Compare Seasons"] if len(partitions) > 1 else []),
+        horizontal=True,
+        key="section_view",
+        label_visibility="collapsed"
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    st.markdown("---")
     
-    st.markdown("---")  # Visual divider
+    # ==================== DEATH STATISTICS CHART ====================
+    if selected_section == "Deaths":
+        profiler.start("Deaths", rows=summary['runs'])
+        st.subheader("Who Dies the Most?")
+        
+        if show_figure(stats, day_num, 'deaths') is None:
+            st.info("No deaths recorded for the selected runs.")
 
     # ==================== TOTAL TIME LOST BY PLAYER ====================
-    st.subheader("Total Time Lost by Player")
-    st.caption("Sum of all run durations where each player died")
-    
-    # Get players sorted by total time lost - use filtered data
-    player_totals = filtered_df.groupby('Player Death')['Approximate Duration (Minutes)'].sum().sort_values(ascending=True)
-    players = player_totals.index.tolist()
-    
-    # Create figure
-    fig_time = go.Figure()
-    
-    # Color palette for runs
-    colors = ['#e74c3c', '#c0392b', '#e67e22', '#d35400', '#f39c12', '#f1c40f', 
-              '#16a085', '#1abc9c', '#3498db', '#2980b9', '#9b59b6', '#8e44ad',
-              '#34495e', '#95a5a6', '#7f8c8d']
-    
-    # For each player, get their runs sorted by duration (longest first) and add as stacked segments
-    for player in players:
-        player_runs = filtered_df[filtered_df['Player Death'] == player].sort_values('Approximate Duration (Minutes)', ascending=False)
-        
-        # Add each run as a segment in the bar
-        for idx, (_, row) in enumerate(player_runs.iterrows()):
-            run_num = row['Run']
-            duration = row['Approximate Duration (Minutes)']
-            
-            # Determine text to display based on segment size
-            # Show both run number and duration if segment is large enough (>20 minutes)
-            if duration >= 30:
-                display_text = f"Run {run_num}<br>{duration} min"
-            else:
-                display_text = f"Run {run_num}"
-            
-            fig_time.add_trace(go.Bar(
-                name=f"Run {run_num}",
-                x=[duration],
-                y=[player],
-                orientation='h',
-                marker=dict(color=colors[idx % len(colors)]),
-                text=display_text,
-                textposition='inside',
-                insidetextanchor='middle',
-                textfont=dict(size=11),
-                hovertemplate=f'<b>{player}</b><br>Run {run_num}<br>Duration: {duration} minutes<extra></extra>',
-                showlegend=False,  # Don't show legend since there are too many runs
-                legendgroup=f"Run {run_num}"
-            ))
-    
-    fig_time.update_layout(
-        barmode='stack',
-        height=500,
-        xaxis_title="Total Minutes Lost",
-        yaxis_title="",
-        font=dict(size=16),
-        xaxis=dict(title_font=dict(size=18), tickfont=dict(size=14)),
-        yaxis=dict(title_font=dict(size=18), tickfont=dict(size=16)),
-        showlegend=False,
-        hovermode='closest',
-        margin=dict(t=20, b=40, l=40, r=40)
-    )
-    
-    st.plotly_chart(fig_time, use_container_width=True)
-    
-    st.markdown("---")  # Visual divider
+    elif selected_section == "Time Lost":
+        profiler.start("Time lost", rows=summary['runs'])
+        st.subheader("Total Time Lost by Player")
+        st.caption("Sum of all run durations where each player died")
+    
+        time_lost_info = show_figure(stats, day_num, 'time_lost')
+        if time_lost_info is None:
+            st.info("No player deaths recorded for the selected runs.")
+        elif time_lost_info['aggregated']:
+            st.caption(f"Showing the {AGGREGATED_SEGMENTS - 1} longest runs per player; shorter runs are combined.")
+            drill_player = st.selectbox(
+                "Show every run of one player:",
+                ["None"] + [player for player in time_lost_info['players'] if player != 'Other players'],
+                key="time_lost_player"
+            )
+            if drill_player != "None":
+                drill_info = show_figure(stats, day_num, 'time_lost', player=drill_player)
+                if drill_info['aggregated']:
+                    st.caption(f"Showing the {MAX_DRILLDOWN_SEGMENTS - 1} longest runs; shorter runs are combined.")
 
     # ==================== VERTICAL RUN TIMELINE ====================
-    st.subheader("Run Timeline")
-    st.caption("All runs stacked vertically in chronological order")
-    
-    # Determine grouping based on filter
-    if selected_day_option == 'All Days':
-        # Group by day when showing all days
-        unique_days_timeline = sorted(filtered_df['Day'].unique())
-        x_labels = [f"Day {day}" for day in unique_days_timeline]
-        group_by_day = True
-    else:
-        # Show single bar when filtered to one day
-        x_labels = ["All Runs"]
-        group_by_day = False
-    
-    # Create figure
-    fig_timeline_vert = go.Figure()
-    
-    # Color palette for runs
-    colors_timeline_v = ['#e74c3c', '#c0392b', '#e67e22', '#d35400', '#f39c12', '#f1c40f', 
-                         '#16a085', '#1abc9c', '#3498db', '#2980b9', '#9b59b6', '#8e44ad',
-                         '#34495e', '#95a5a6', '#7f8c8d']
-    
-    if group_by_day:
-        # For each day, create a vertical stacked bar
-        for day in unique_days_timeline:
-            day_runs = filtered_df[filtered_df['Day'] == day].sort_values('Run')
-            
-            # Add each run as a segment in the vertical bar
-            for idx, (_, row) in enumerate(day_runs.iterrows()):
-                run_num = row['Run']
-                duration = row['Approximate Duration (Minutes)']
-                player = row['Player Death']
-                
-                # Determine text to display based on segment size
-                if duration >= 30:
-                    display_text = f"Run {run_num}"
-                else:
-                    display_text = f""
-                
-                fig_timeline_vert.add_trace(go.Bar(
-                    name=f"Run {run_num}",
-                    x=[f"Day {day}"],
-                    y=[duration],
-                    marker=dict(color=colors_timeline_v[idx % len(colors_timeline_v)]),
-                    text=display_text,
-                    textposition='inside',
-                    insidetextanchor='middle',
-                    textfont=dict(size=11),
-                    hovertemplate=f'<b>Run {run_num}</b><br>Day {day}<br>Player: {player}<br>Duration: {duration} minutes<extra></extra>',
-                    showlegend=False
-                ))
-    else:
-        # Single bar with all filtered runs
-        runs_sorted = filtered_df.sort_values('Run')
-        for idx, (_, row) in enumerate(runs_sorted.iterrows()):
-            run_num = row['Run']
-            duration = row['Approximate Duration (Minutes)']
-            player = row['Player Death']
-            
-            # Determine text to display based on segment size
-            if duration >= 30:
-                display_text = f"Run {run_num}"
-            else:
-                display_text = f""
-        
-            fig_timeline_vert.add_trace(go.Bar(
-                name=f"Run {run_num}",
-                x=["All Runs"],
-                y=[duration],
-                marker=dict(color=colors_timeline_v[idx % len(colors_timeline_v)]),
-                text=display_text,
-                textposition='inside',
-                insidetextanchor='middle',
-                textfont=dict(size=11),
-                hovertemplate=f'<b>Run {run_num}</b><br>Player: {player}<br>Duration: {duration} minutes<extra></extra>',
-                showlegend=False
-            ))
-    
-    fig_timeline_vert.update_layout(
-        barmode='stack',
-        height=600,
-        xaxis=dict(
-            title="",
-            title_font=dict(size=18), 
-            tickfont=dict(size=14),
-            side='top'  # Move x-axis to top
-        ),
-        yaxis=dict(
-            title="Duration (Minutes)",
-            title_font=dict(size=18), 
-            tickfont=dict(size=14),
-            autorange='reversed'  # Bars go top to bottom
-        ),
-        font=dict(size=16),
-        showlegend=False,
-        hovermode='closest',
-        margin=dict(t=60, b=40, l=60, r=40)
-    )
-    
-    st.plotly_chart(fig_timeline_vert, use_container_width=True)
-    
-    st.markdown("---")  # Visual divider
+    elif selected_section == "Timeline":
+        profiler.start("Timeline", rows=summary['runs'])
+        st.subheader("Run Timeline")
+        st.caption("All runs stacked vertically in chronological order")
+    
+        show_all_runs = day_num is not None and st.session_state.get("timeline_full", False)
+        timeline_info = show_figure(stats, day_num, 'timeline', full=show_all_runs)
+        if timeline_info['binned']:
+            st.caption("Consecutive days share a bar to keep the chart responsive.")
+        if timeline_info['aggregated']:
+            st.caption("Consecutive runs are combined into larger segments to keep the chart responsive.")
+            if day_num is None:
+                st.caption("Pick a day at the top of the page to see its runs in more detail.")
+        if day_num is not None and (timeline_info['aggregated'] or show_all_runs):
+            st.checkbox("Show every run of this day", key="timeline_full")
 
     # ==================== ACHIEVEMENT DURATION PREDICTION ====================
-    st.subheader("Time to Reach Milestone Achievements")
-    st.caption("Average run duration where milestone achievements were completed")
-    
-    # Get achievement columns in order - use filtered data
-    achievement_cols_pred = [col for col in filtered_df.columns if col.startswith('Achievement:')]
-    
-    # Calculate average duration for each achievement (only for completed ones)
-    achievement_durations = []
-    achievement_names_completed = []
-    for idx, ach in enumerate(achievement_cols_pred):
-        runs_with_ach = filtered_df[filtered_df[ach] == True]
-        ach_name = ach.replace('Achievement: ', '')
-        if len(runs_with_ach) > 0:
-            avg_duration = runs_with_ach['Approximate Duration (Minutes)'].mean()
-            achievement_durations.append(avg_duration)
-            achievement_names_completed.append(ach_name)
+    elif selected_section == "Milestones":
+        profiler.start("Milestone prediction", rows=summary['runs'])
+        st.subheader("Time to Reach Milestone Achievements")
+        st.caption("Average run duration where milestone achievements were completed")
+    
+        milestone_info = show_figure(stats, day_num, 'milestones')
+        if milestone_info is not None:
+            # Show prediction details
+            st.caption(
+                f"Linear regression model (R² = {milestone_info['r2']:.3f}). "
+                "Error bars show the 95% bootstrap confidence interval of each average."
+            )
+        else:
+            st.info("Need at least 2 completed achievements to generate predictions.")
+
+    # ==================== ACHIEVEMENT COMPLETION RATE PIE CHART ====================
+    elif selected_section == "Completion Rates":
+        profiler.start("Completion pie", rows=summary['runs'])
+        st.subheader("Milestone Achievement Completion Rates")
+        st.caption("Percentage of runs that reached each achievement milestone. Achievements marked with asterisk have not been completed in any run yet.")
     
-    if len(achievement_durations) >= 2:
-        import numpy as np
-        from sklearn.linear_model import LinearRegression
+        show_figure(stats, day_num, 'completion')
+
+
+    # ==================== DAY-BY-DAY TRENDS ====================
+    elif selected_section == "Trends":
+        profiler.start("Trends", rows=len(stats.runs))
+        st.subheader("Performance Trends Across Days")
+        st.caption("Track how key metrics evolved over each streaming day")
+    
+        # Only show this if "All Days" is selected
+        if selected_day_option == 'All Days':
+            # Create side-by-side charts using columns
+            col1, col2 = st.columns(2)
         
-        # Prepare data for linear regression
-        X = np.array(range(len(achievement_durations))).reshape(-1, 1)
-        y = np.array(achievement_durations)
+            # LEFT CHART: Max/Peak Performance
+            with col1:
+                show_figure(stats, None, 'peak_trends')
         
-        # Fit linear regression model
-        model = LinearRegression()
-        model.fit(X, y)
+            # RIGHT CHART: Average Performance
+            with col2:
+                show_figure(stats, None, 'average_trends')
+        else:
+            st.info("📊 Select 'All Days' to see performance trends across days")
+
+    # ==================== SURVIVAL ANALYSIS ====================
+    elif selected_section == "Survival":
+        profiler.start("Survival", rows=summary['runs'])
+        st.subheader("How Long Do Runs Last?")
+        st.caption("Share of runs still going after each minute (Kaplan–Meier, with its 95% band); "
+                   "runs without a recorded death count up to their duration")
         
-        # Predict for all achievements (including unachieved ones)
-        all_achievement_names = [col.replace('Achievement: ', '') for col in achievement_cols_pred]
-        X_all = np.array(range(len(all_achievement_names))).reshape(-1, 1)
-        predictions = model.predict(X_all)
+        # Answered from the survival curves cached on the index, so this is instant
+        survival_minutes = st.number_input(
+            "Chance that a run lasts longer than (minutes):",
+            min_value=0, value=60, step=5, key="survival_minutes"
+        )
+        survival_players = stats.time_lost(day_num).sort_values(ascending=False).index
+        survival_cols = st.columns(1 + len(survival_players))
+        survival_cols[0].metric("Run still going", f"{stats.survival_probability(survival_minutes, day_num):.0%}")
+        for col, player in zip(survival_cols[1:], survival_players):
+            col.metric(f"{player} still alive", f"{stats.survival_probability(survival_minutes, day_num, player):.0%}")
         
-        # Create visualization
-        fig_pred = go.Figure()
+        show_figure(stats, day_num, 'run_survival')
         
-        # Add actual data points
-        fig_pred.add_trace(go.Scatter(
-            x=list(range(len(achievement_durations))),
-            y=achievement_durations,
-            mode='markers',
-            name='Actual Average Duration',
-            marker=dict(size=12, color='#4CAF50'),
-            hovertemplate='<b>%{text}</b><br>Average Duration: %{y:.1f} minutes<extra></extra>',
-            text=achievement_names_completed
-        ))
+        st.subheader("What Ends Runs?")
+        st.caption("Cumulative hazard of each cause of death (Nelson–Aalen): how many deaths to that cause "
+                   "a run would be expected to have had by each minute if nothing else killed it first")
+        show_figure(stats, day_num, 'cause_hazards')
+
+    # ==================== FULL DATA TABLE ====================
+    elif selected_section == "Run Data":
+        profiler.start("Data table", rows=summary['runs'])
+        st.subheader("Run Data")
+    
+        # Only the visible page of rows is sent to the browser. Sorting uses the
+        # index's precomputed row orders, and only the chosen columns are built
+        basic_cols = ['Run', 'Day', 'Approximate Duration (Minutes)', 'Player Death', 'Cause of Death']
+        all_columns = basic_cols + stats.achievements
         
-        # Add single continuous trend line through all achievements
-        fig_pred.add_trace(go.Scatter(
-            x=list(range(len(predictions))),
-            y=predictions,
-            mode='lines',
-            name='Trend Line',
-            line=dict(color='#2196F3', width=2, dash='dash'),
-            hoverinfo='skip'
-        ))
+        control_col1, control_col2, control_col3, control_col4 = st.columns([3, 2, 1, 1])
+        with control_col1:
+            shown_columns = st.multiselect("Columns", all_columns, default=all_columns, key="table_columns")
+        with control_col2:
+            sort_by = st.selectbox("Sort by", all_columns, index=0, key="table_sort")
+        with control_col3:
+            descending = st.toggle("Descending", key="table_descending")
+        with control_col4:
+            page_size = st.selectbox("Rows per page", TABLE_PAGE_SIZES, index=1, key="table_page_size")
         
-        # Add predictions for unachieved achievements
-        if len(predictions) > len(achievement_durations):
-            fig_pred.add_trace(go.Scatter(
-                x=list(range(len(achievement_durations), len(predictions))),
-                y=predictions[len(achievement_durations):],
-                mode='markers',
-                name='Predicted Duration',
-                marker=dict(size=12, color='#FF9800', symbol='diamond'),
-                hovertemplate='<b>%{text}</b><br>Predicted Duration: %{y:.1f} minutes<extra></extra>',
-                text=all_achievement_names[len(achievement_durations):]
-            ))
+        total_rows = summary['runs']
+        page_count = max(1, -(-total_rows // page_size))
+        # A smaller day or a bigger page size can leave the remembered page out of range
+        if st.session_state.get("table_page", 1) > page_count:
+            st.session_state["table_page"] = 1
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="table_page")
         
-        fig_pred.update_layout(
-            height=400,
-            xaxis_title="Achievement Progression",
-            yaxis_title="Average Duration (Minutes)",
-            font=dict(size=14),
-            xaxis=dict(
-                title_font=dict(size=16),
-                tickfont=dict(size=12),
-                tickmode='array',
-                tickvals=list(range(len(all_achievement_names))),
-                ticktext=all_achievement_names,
-                tickangle=-45
-            ),
-            yaxis=dict(title_font=dict(size=16), tickfont=dict(size=12)),
-            hovermode='closest',
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            margin=dict(t=20, b=120, l=60, r=40)
+        rows = stats.sorted_rows(day_num, sort_by, descending)[(page - 1) * page_size:page * page_size]
+        page_runs = stats.runs.iloc[rows]
+        shown_achievements = [name for name in stats.achievements if name in shown_columns]
+        display_df = pd.concat(
+            [page_runs[[col for col in basic_cols if col in shown_columns]],
+             achievement_flags(page_runs)[shown_achievements]],
+            axis=1
         )
         
-        st.plotly_chart(fig_pred, use_container_width=True)
+        # Configure column display; durations are stored as float32 but are
+        # normally whole minutes
+        column_config = {
+            'Approximate Duration (Minutes)': st.column_config.NumberColumn(format="%g"),
+        }
         
-        # Show prediction details
-        st.caption(f"Linear regression model (R² = {model.score(X, y):.3f})")
-    else:
-        st.info("Need at least 2 completed achievements to generate predictions.")
-    
-    st.markdown("---")  # Visual divider
-
-    # ==================== ACHIEVEMENT COMPLETION RATE PIE CHART ====================
-    st.subheader("Milestone Achievement Completion Rates")
-    st.caption("Percentage of runs that reached each achievement milestone. Achievements marked with asterisk have not been completed in any run yet.")
-    
-    # Get achievement columns - use filtered data
-    achievement_cols = [col for col in filtered_df.columns if col.startswith('Achievement:')]
-    total_runs = len(filtered_df)
-    
-    # Calculate completion rates for each achievement
-    pie_data = []
-    for idx, ach in enumerate(achievement_cols):
-        runs_with_ach = filtered_df[filtered_df[ach] == True]
-        ach_name = ach.replace('Achievement: ', '')
-        count = len(runs_with_ach)
-        percentage = (count / total_runs) * 100
+        # Style achievement columns with custom configuration
+        for ach_name in shown_achievements:
+            column_config[ach_name] = st.column_config.CheckboxColumn(
+                ach_name,
+                help=f"Achievement: {ach_name}",
+                default=False,
+            )
         
-        # Mark achievements that haven't been completed yet
-        if count == 0:
-            label = f"{ach_name} *"
+        # Use st.data_editor instead of st.dataframe to avoid internal scrolling
+        if session_budget.charge(session_id, int(display_df.memory_usage(deep=True).sum())):
+            st.data_editor(
+                display_df,
+                width="stretch",
+                height="content",
+                use_container_width=True,
+                column_config=column_config,
+                hide_index=True,
+                disabled=True,
+                num_rows="fixed"
+            )
         else:
-            label = ach_name
+            st.warning("The table was skipped to keep the server's memory in check. Try a smaller page size.")
         
-        pie_data.append({
-            'Achievement': label,
-            'Count': count,
-            'Percentage': percentage,
-            'Has Data': count > 0,
-            'Order': idx  # Track achievement order
-        })
-    
-    # Add "No Milestones" category - runs that didn't get any milestone achievements
-    runs_with_no_achievements = filtered_df[~filtered_df[achievement_cols].any(axis=1)]
-    no_ach_count = len(runs_with_no_achievements)
-    no_ach_percentage = (no_ach_count / total_runs) * 100
-    
-    pie_data.append({
-        'Achievement': 'No Milestone Achievements',
-        'Count': no_ach_count,
-        'Percentage': no_ach_percentage,
-        'Has Data': True,
-        'Order': -1  # Put at beginning
-    })
-    
-    # Create DataFrame
-    pie_df = pd.DataFrame(pie_data)
-    
-    # Create pie chart
-    fig_pie = go.Figure()
-    
-    # Progressive monochrome color palette - lighter to darker
-    # Early achievements (common) = lighter, later achievements (rare) = darker
-    achievement_colors = [
-        '#B2DFDB',  # No Milestone Achievements - light teal
-        '#80CBC4',  # Acquire Hardware - light green-teal
-        '#4DB6AC',  # We Need to Go Deeper - medium green-teal
-        '#26A69A',  # A Terrible Fortress - darker green-teal
-        '#00897B',  # Into Fire - deep green-teal
-        '#00695C',  # Eye Spy - very dark green-teal
-        '#004D40',  # The End? - darkest green-teal (not achieved)
-        '#00251A'   # Free the end - extremely dark green-teal (not achieved)
-    ]
-    
-    # Assign colors based on order
-    colors = []
-    for _, row in pie_df.iterrows():
-        order = row['Order']
-        if order == -1:
-            colors.append(achievement_colors[0])  # No Achievements
-        else:
-            colors.append(achievement_colors[order + 1])
-    
-    fig_pie.add_trace(go.Pie(
-        labels=pie_df['Achievement'],
-        values=pie_df['Count'],
-        marker=dict(colors=colors),
-        textinfo='label+percent',
-        textfont=dict(size=14),
-        hovertemplate='<b>%{label}</b><br>Runs: %{value}<br>Percentage: %{percent}<extra></extra>'
-    ))
-    
-    fig_pie.update_layout(
-        height=500,
-        font=dict(size=14),
-        showlegend=False,
-        margin=dict(t=20, b=60, l=40, r=40)
-    )
-    
-    st.plotly_chart(fig_pie, use_container_width=True)
-    
-    st.markdown("---")  # Visual divider
-
+        # Show summary stats
+        first_row = min(total_rows, (page - 1) * page_size + 1)
+        last_row = min(total_rows, page * page_size)
+        st.caption(f"Rows {first_row}–{last_row} of {total_rows} | Total Runs: {summary['runs']} | Total Players: {summary['players']}")
 
-    # ==================== DAY-BY-DAY TRENDS ====================
-    st.subheader("Performance Trends Across Days")
-    st.caption("Track how key metrics evolved over each streaming day")
-    
-    # Only show this if "All Days" is selected
-    if selected_day_option == 'All Days':
-        # Calculate metrics for each day
-        unique_days_trend = sorted(df['Day'].unique())
-        day_trend_data = []
+    # ==================== EVENT LOG: REAL MILESTONE TIMES ====================
+    elif selected_section == "Event Times":
+        profiler.start("Event times", rows=len(events))
+        st.subheader("Time to Reach Milestones")
+        st.caption("Minutes into each run at which achievements were reached, from the season's event log")
+        show_figure(stats, day_num, 'milestone_times', events)
         
-        achievement_cols_trend = [col for col in df.columns if col.startswith('Achievement:')]
+        st.subheader("How Long Do Runs Survive?")
+        st.caption("Share of logged runs still going after each minute; runs without a logged death are counted until their last event")
+        show_figure(stats, day_num, 'survival', events)
+
+    # ==================== CROSS-SEASON COMPARISON ====================
+    elif selected_section == "Compare Seasons":
+        profiler.start("Season comparison")
+        st.subheader("Season Comparison")
+        st.caption("Every season over all of its days; the day filter above does not apply here")
         
-        for day in unique_days_trend:
-            day_df = df[df['Day'] == day]
-            
-            # Average run duration
-            avg_run_duration = day_df['Approximate Duration (Minutes)'].mean()
-            
-            # Longest run duration
-            max_run_duration = day_df['Approximate Duration (Minutes)'].max()
-            
-            # Average achievements per run
-            avg_achievements = day_df[achievement_cols_trend].sum(axis=1).mean()
-            
-            # Furthest achievement reached (count of unique achievements completed)
-            furthest_achievement_idx = -1
-            for idx, ach in enumerate(achievement_cols_trend):
-                if day_df[ach].any():
-                    furthest_achievement_idx = idx
-            
-            day_trend_data.append({
-                'Day': day,
-                'Avg Duration': avg_run_duration,
-                'Max Duration': max_run_duration,
-                'Avg Milestone Achievements': avg_achievements,
-                'Furthest Milestone Achievement': furthest_achievement_idx + 1
+        # Loads every partition that hasn't been opened yet
+        season_stats = {partition_label(p, partitions): seasons.get(*p).current() for p in partitions}
+        comparison_rows = []
+        for label, season in season_stats.items():
+            season_summary = season.summary(None)
+            comparison_rows.append({
+                'Season': label,
+                'Days': len(season.days),
+                'Runs': season_summary['runs'],
+                'Total Time (Minutes)': int(season_summary['total_duration']),
+                'Avg Duration (Minutes)': round(float(season_summary['avg_duration']), 1),
+                'Longest Run (Minutes)': int(season_summary['max_duration']),
+                'Most Common Death': season_summary['most_common_death'],
+                'Players': season_summary['players'],
             })
+        st.dataframe(pd.DataFrame(comparison_rows), hide_index=True, use_container_width=True)
         
-        trend_df = pd.DataFrame(day_trend_data)
-        
-        # Create side-by-side charts using columns
-        col1, col2 = st.columns(2)
-        
-        # LEFT CHART: Max/Peak Performance
-        with col1:
-            fig_max = go.Figure()
-            
-            # Max Duration
-            fig_max.add_trace(go.Scatter(
-                x=trend_df['Day'],
-                y=trend_df['Max Duration'],
-                mode='lines+markers',
-                name='Longest Run Duration',
-                line=dict(color='#4CAF50', width=3),
-                marker=dict(size=10)
-            ))
-            
-            # Furthest Achievement
-            fig_max.add_trace(go.Scatter(
-                x=trend_df['Day'],
-                y=trend_df['Furthest Milestone Achievement'],
-                mode='lines+markers',
-                name='Furthest Milestone Achievement Reached',
-                line=dict(color='#FF9800', width=3),
-                marker=dict(size=10),
-                yaxis='y2'
-            ))
-            
-            fig_max.update_layout(
-                title='Peak Performance by Day',
-                title_font=dict(size=16),
-                height=450,
-                xaxis=dict(
-                    title='Day',
-                    tickmode='array',
-                    tickvals=unique_days_trend,
-                    ticktext=[f'Day {d}' for d in unique_days_trend],
-                    title_font=dict(size=14),
-                    tickfont=dict(size=12)
-                ),
-                yaxis=dict(
-                    title='Duration (Minutes)',
-                    title_font=dict(color='#4CAF50', size=14),
-                    tickfont=dict(color='#4CAF50', size=11)
-                ),
-                yaxis2=dict(
-                    title='Milestone Achievements',
-                    title_font=dict(color='#FF9800', size=14),
-                    tickfont=dict(color='#FF9800', size=11),
-                    overlaying='y',
-                    side='right'
-                ),
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1,
-                    font=dict(size=10)
-                ),
-                hovermode='x unified',
-                margin=dict(t=60, b=60, l=60, r=60)
-            )
-            
-            st.plotly_chart(fig_max, use_container_width=True)
-        
-        # RIGHT CHART: Average Performance
-        with col2:
-            fig_avg = go.Figure()
-            
-            # Average Duration
-            fig_avg.add_trace(go.Scatter(
-                x=trend_df['Day'],
-                y=trend_df['Avg Duration'],
-                mode='lines+markers',
-                name='Average Run Duration',
-                line=dict(color='#4CAF50', width=3),
-                marker=dict(size=10)
-            ))
-            
-            # Average Achievements
-            fig_avg.add_trace(go.Scatter(
-                x=trend_df['Day'],
-                y=trend_df['Avg Milestone Achievements'],
-                mode='lines+markers',
-                name='Avg Milestone Achievements per Run',
-                line=dict(color='#FF9800', width=3),
-                marker=dict(size=10),
-                yaxis='y2'
-            ))
-            
-            fig_avg.update_layout(
-                title='Average Performance by Day',
-                title_font=dict(size=16),
-                height=450,
-                xaxis=dict(
-                    title='Day',
-                    tickmode='array',
-                    tickvals=unique_days_trend,
-                    ticktext=[f'Day {d}' for d in unique_days_trend],
-                    title_font=dict(size=14),
-                    tickfont=dict(size=12)
-                ),
-                yaxis=dict(
-                    title='Duration (Minutes)',
-                    title_font=dict(color='#4CAF50', size=14),
-                    tickfont=dict(color='#4CAF50', size=11)
-                ),
-                yaxis2=dict(
-                    title='Milestone Achievements',
-                    title_font=dict(color='#FF9800', size=14),
-                    tickfont=dict(color='#FF9800', size=11),
-                    overlaying='y',
-                    side='right'
-                ),
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1,
-                    font=dict(size=10)
-                ),
-                hovermode='x unified',
-                margin=dict(t=60, b=60, l=60, r=60)
-            )
-            
-            st.plotly_chart(fig_avg, use_container_width=True)
-    else:
-        st.info("📊 Select 'All Days' to see performance trends across days")
-    
-    st.markdown("---")  # Visual divider
-
-    # ==================== FULL DATA TABLE ====================
-    st.subheader("Run Data")
-    
-    # Create a copy of the filtered dataframe for display
-    display_df = filtered_df.copy()
-    
-    # Separate basic stats and achievements
-    basic_cols = ['Run', 'Day', 'Approximate Duration (Minutes)', 'Player Death', 'Cause of Death']
-    achievement_cols_table = [col for col in display_df.columns if col.startswith('Achievement:')]
-    
-    # Rename achievement columns to remove "Achievement: " prefix
-    rename_dict = {col: col.replace('Achievement: ', '' if display_df[col].any() else '') for col in achievement_cols_table}
-    display_df = display_df.rename(columns=rename_dict)
-    
-    # Reorder columns: basic stats first, then achievements
-    new_achievement_names = [rename_dict[col] for col in achievement_cols_table]
-    display_df = display_df[basic_cols + new_achievement_names]
-    
-    # Configure column display
-    column_config = {}
-    
-    # Style achievement columns with custom configuration
-    for old_col, new_col in rename_dict.items():
-        column_config[new_col] = st.column_config.CheckboxColumn(
-            new_col,
-            help=f"Achievement: {old_col.replace('Achievement: ', '')}",
-            default=False,
+        st.markdown("#### Milestone Achievement Completion Rates")
+        comparison_fig, _ = build_season_comparison(season_stats)
+        st.plotly_chart(comparison_fig, use_container_width=True)
+    
+    profiler.finish()
+    
+    # ==================== PERFORMANCE DEBUG PANEL ====================
+    with st.expander("🛠️ Performance (debug)"):
+        st.checkbox(
+            "Track peak memory per section (slows the page down)",
+            key="profile_memory",
+            help="Uses tracemalloc; takes effect from the next rerun"
         )
-      
-    # Use st.data_editor instead of st.dataframe to avoid internal scrolling
-    st.data_editor(
-        display_df,
-        width="stretch",
-        height="content",
-        use_container_width=True,
-        column_config=column_config,
-        hide_index=True,
-        disabled=True,
-        num_rows="fixed"
-    )
-    
-    # Show summary stats
-    st.caption(f"Total Runs: {len(filtered_df)} | Total Players: {filtered_df['Player Death'].nunique()}")
+        profile_df = profiler.to_frame()
+        st.dataframe(profile_df, hide_index=True, use_container_width=True)
+        st.caption(f"Total: {profile_df['seconds'].sum() * 1000:.0f} ms | Data version {stats.version}")
+        budget = session_budget.snapshot()
+        st.caption(
+            f"This rerun: {session_budget.used(session_id) / 2**20:.1f} MB of {SESSION_MEMORY_BYTES / 2**20:.0f} MB | "
+            f"All reruns in progress: {budget['sessions']} using {budget['total_bytes'] / 2**20:.1f} MB of "
+            f"{TOTAL_SESSION_MEMORY_BYTES / 2**20:.0f} MB | Skipped elements: {budget['refused']}"
+        )
+        download_col1, download_col2 = st.columns(2)
+        with download_col1:
+            st.download_button("Download JSON", profiler.to_json(), file_name="profile.json", mime="application/json")
+        with download_col2:
+            st.download_button("Download CSV", profiler.to_csv(), file_name="profile.csv", mime="text/csv")
     
 except FileNotFoundError:
-    st.error("Could not find 'stats.ods'. Please make sure the file is in the same directory as app.py")
+    st.error("Could not find 'stats.ods' (or any other .ods stats file). Please make sure the file is in the same directory as app.py")
 except Exception as e:
     st.error(f"Error loading data: {str(e)}")
+finally:
+    session_budget.end(session_id)
@@ -0,0 +1,202 @@
+"""Scaling benchmark for the dashboard's data and chart pipeline.
+
+Generates synthetic run tables with the same columns as stats.ods (Run, Day,
+Approximate Duration (Minutes), Player Death, Cause of Death, Achievement: *)
+and times each stage separately at several sizes, recording peak traced memory
+per stage:
+
+    python benchmark.py --sizes 1000 10000 100000 1000000
+    python benchmark.py --sizes 1000 10000 --json bench.json --csv bench.csv
+
+Writing and parsing real .ods files is only done up to --ods-max rows, since
+writing them with odfpy takes minutes for sheets much larger than that. Memory tracing slows the
+timed code down noticeably; pass --no-memory for cleaner timings.
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from aggregates import StatsIndex
+from charts import CHARTS, build_time_lost, build_timeline
+from events import EventLog
+from filters import RunFilter
+from loader import ACHIEVEMENT_PREFIX, achievement_flags, load_runs, typed_runs
+
+PLAYERS = ['Neuro', 'Vedal', 'Filian', 'Crelly']
+CAUSES = ['Zombie', 'Creeper', 'Skeleton', 'Spider', 'Fall Damage', 'Lava', 'Drowned (Mob)',
+          'Enderman', 'Blaze', 'Piglin', 'Wolf', 'Starvation', 'Neuro']
+ACHIEVEMENTS = ['Acquire Hardware', 'We Need to Go Deeper', 'A Terrible Fortress', 'Into Fire',
+                'Eye Spy', 'The End?', 'Free the end.']
+
+
+def generate_runs(rows, runs_per_day=30, seed=0):
+    """Synthetic runs table shaped like stats.ods as read by pandas"""
+    rng = np.random.default_rng(seed)
+    durations = np.maximum(1, rng.lognormal(mean=2.8, sigma=1.0, size=rows).round()).astype(np.int64)
+
+    # Longer runs get further; milestones are reached in order
+    progress = np.minimum(len(ACHIEVEMENTS), (np.log1p(durations) * rng.uniform(0.3, 0.9, rows)).astype(int) - 1)
+    progress = np.maximum(progress, 0)
+
+    data = {
+        'Run': np.arange(1, rows + 1),
+        'Day': np.arange(rows) // runs_per_day + 1,
+        'Approximate Duration (Minutes)': durations,
+        'Player Death': rng.choice(PLAYERS, size=rows),
+        'Cause of Death': rng.choice(CAUSES, size=rows),
+    }
+    for idx, name in enumerate(ACHIEVEMENTS):
+        data[ACHIEVEMENT_PREFIX + name] = progress > idx
+    return pd.DataFrame(data)
+
+
+def generate_events(raw):
+    """Synthetic event log for a generated runs table: its achievements spread
+    evenly over each run, then the death at the end"""
+    durations = raw['Approximate Duration (Minutes)'].to_numpy(dtype=np.float64)
+    flags = raw[[ACHIEVEMENT_PREFIX + name for name in ACHIEVEMENTS]].to_numpy()
+    reached = flags.sum(axis=1)
+    rows, positions = np.nonzero(flags)
+    achievements = pd.DataFrame({
+        'Run': raw['Run'].to_numpy()[rows],
+        'Minute': (durations[rows] * (positions + 1) / (reached[rows] + 1)).round(1),
+        'Event': 'achievement',
+        'Name': np.array(ACHIEVEMENTS, dtype=object)[positions],
+        'Player': None,
+    })
+    deaths = pd.DataFrame({
+        'Run': raw['Run'].to_numpy(),
+        'Minute': durations,
+        'Event': 'death',
+        'Name': raw['Cause of Death'].to_numpy(),
+        'Player': raw['Player Death'].to_numpy(),
+    })
+    return pd.concat([achievements, deaths], ignore_index=True)
+
+
+def measure(results, size, stage, func):
+    """Run `func`, record wall time and peak traced memory, return its result"""
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    value = func()
+    seconds = time.perf_counter() - started
+    peak_mb = None
+    if tracing:
+        _, peak = tracemalloc.get_traced_memory()
+        peak_mb = round((peak - before) / 2**20, 3)
+    results.append({
+        'rows': size,
+        'stage': stage,
+        'seconds': round(seconds, 6),
+        'peak_mb': peak_mb,
+    })
+    return value
+
+
+def run_size(size, ods_max, workdir):
+    results = []
+    raw = measure(results, size, 'generate', lambda: generate_runs(size))
+
+    if size <= ods_max:
+        ods_path = os.path.join(workdir, f'runs-{size}.ods')
+        cache_dir = os.path.join(workdir, 'cache')
+        measure(results, size, 'write ods', lambda: raw.to_excel(ods_path, engine='odf', index=False))
+        measure(results, size, 'load (parse ods + write cache)', lambda: load_runs(ods_path, cache_dir))
+        runs = measure(results, size, 'load (arrow cache)', lambda: load_runs(ods_path, cache_dir))
+    else:
+        runs = measure(results, size, 'validate + apply schema', lambda: typed_runs(raw))
+
+    stats = measure(results, size, 'aggregate index', lambda: StatsIndex(runs))
+    measure(results, size, 'filter (every day)', lambda: [stats.day_runs(day) for day in stats.days])
+    measure(results, size, 'summary (all days)', lambda: stats.summary(None))
+
+    # Multi-dimensional filter: day range, two players, one achievement, long runs
+    run_filter = RunFilter(days=(1, stats.days[len(stats.days) // 2]), players=PLAYERS[:2],
+                           achievements=ACHIEVEMENTS[:1], duration=(10, None))
+    measure(results, size, 'filter index', stats.filter_index)
+    measure(results, size, 'resolve filter', lambda: stats.filter_index().positions(run_filter))
+    measure(results, size, 'select (filtered index)', lambda: stats.select(run_filter))
+
+    for name, build in CHARTS.items():
+        fig, _ = measure(results, size, f'build {name}', lambda: build(stats, None))
+        if fig is not None:
+            spec = measure(results, size, f'serialize {name}', fig.to_json)
+            results[-1]['figure_kb'] = round(len(spec) / 1024, 1)
+            results[-1]['traces'] = len(fig.data)
+
+    # Drill-down views get the larger MAX_DRILLDOWN_SEGMENTS budget
+    drilldowns = {
+        'timeline (one day, every run)': lambda: build_timeline(stats, stats.days[-1], full=True),
+        'time_lost (one player)': lambda: build_time_lost(stats, None, player=stats.time_lost().index[-1]),
+    }
+    for name, build in drilldowns.items():
+        fig, _ = measure(results, size, f'build {name}', build)
+        spec = measure(results, size, f'serialize {name}', fig.to_json)
+        results[-1]['figure_kb'] = round(len(spec) / 1024, 1)
+        results[-1]['traces'] = len(fig.data)
+
+    measure(results, size, 'table (unpack achievements)',
+            lambda: pd.concat([runs.drop(columns='Achievements'), achievement_flags(runs)], axis=1))
+
+    # Event log: everything but the last run in one append, then that run alone
+    events = measure(results, size, 'generate events', lambda: generate_events(raw))
+    last_run = events['Run'] == size
+    log = EventLog(os.path.join(workdir, f'events-{size}'))
+    measure(results, size, 'event log append (bulk)', lambda: log.append(events[~last_run]))
+    measure(results, size, 'event log append (one run)', lambda: log.append(events[last_run]))
+    measure(results, size, 'event log reopen', lambda: EventLog(log.directory))
+    measure(results, size, 'events of one run', lambda: log.index.run_events(size // 2))
+    measure(results, size, 'time to milestone', lambda: log.index.milestone_distribution(ACHIEVEMENTS))
+    measure(results, size, 'survival curve', lambda: log.index.survival())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard pipeline on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--ods-max', type=int, default=10000, help="largest size to round-trip through .ods")
+    parser.add_argument('--json', help="write results as JSON to this path")
+    parser.add_argument('--csv', help="write results as CSV to this path")
+    parser.add_argument('--no-memory', action='store_true', help="skip tracemalloc peak memory tracking")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Warm up imports and caches so the first size isn't charged for them
+        run_size(100, 0, workdir)
+        if not args.no_memory:
+            tracemalloc.start()
+        for size in args.sizes:
+            size_results = run_size(size, args.ods_max, workdir)
+            results.extend(size_results)
+            print(f"\n{size:,} rows")
+            for row in size_results:
+                extra = f"  {row['figure_kb']} KB, {row['traces']} traces" if 'figure_kb' in row else ''
+                memory = '' if row['peak_mb'] is None else f"{row['peak_mb']:9.1f} MB"
+                print(f"  {row['stage']:<34} {row['seconds'] * 1000:10.1f} ms {memory}{extra}")
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.csv:
+        fields = ['rows', 'stage', 'seconds', 'peak_mb', 'figure_kb', 'traces']
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,862 @@
+"""Plotly figure builders for the dashboard sections.
+
+Every builder is a pure function of a StatsIndex and a day (None for all days)
+and returns `(figure, info)`: the figure, or None when there is nothing to
+draw, plus a small dict of extra values the page shows next to it. Nothing
+here touches Streamlit, so the same figures can be cached, shared between
+sessions or rendered outside the app.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from lod import (AGGREGATED_SEGMENTS, MAX_DETAILED_RUNS, MAX_DRILLDOWN_SEGMENTS, MAX_PLAYER_BARS,
+                 MAX_TIMELINE_BARS, MAX_TREND_POINTS, bin_size, range_label, sample_steps)
+
+
+def format_minutes(values):
+    """Format durations without a trailing '.0' for whole minutes"""
+    return values.map('{:g}'.format)
+
+
+def add_stack_position_traces(fig, segments, colors, hovertemplate, horizontal=False):
+    """Add stacked bar segments to a figure using one trace per palette colour.
+
+    `segments` holds one row per segment, already in stacking order, with 'Bar',
+    'Position', 'Value' and 'Text' columns, plus 'Label' and 'Detail' which the
+    hovertemplate reads as customdata[0] and customdata[1]; the segment's own
+    value is customdata[2]. Each segment is drawn from an explicit base (the
+    total of the segments below it), so the layout must use barmode='overlay',
+    and %{x}/%{y} in the hover would show where the stack ends rather than the
+    segment's value. Segment k takes colour k of the palette,
+    which keeps the trace count bounded by the palette size however many runs
+    there are.
+    """
+    segments = segments.assign(
+        Base=segments.groupby('Bar', observed=True)['Value'].cumsum() - segments['Value'],
+        Color=segments['Position'] % len(colors)
+    )
+    for color_idx, group in segments.groupby('Color', sort=True):
+        bars = group['Bar'].to_numpy()
+        values = group['Value'].to_numpy()
+        fig.add_trace(go.Bar(
+            name=f"Segment {color_idx + 1}",
+            x=values if horizontal else bars,
+            y=bars if horizontal else values,
+            base=group['Base'].to_numpy(),
+            orientation='h' if horizontal else 'v',
+            marker=dict(color=colors[color_idx]),
+            text=group['Text'].to_numpy(),
+            textposition='inside',
+            insidetextanchor='middle',
+            textfont=dict(size=11),
+            customdata=group[['Label', 'Detail', 'Value']].to_numpy(),
+            hovertemplate=hovertemplate,
+            showlegend=False
+        ))
+
+
+def build_deaths(stats, day):
+    """'Who Dies the Most?' stacked bar chart; no figure without recorded deaths"""
+    # Prepare data for stacked bar chart from the per-day death counts
+    death_data = stats.deaths(day)
+    if death_data.empty:
+        return None, {}
+
+    # Pivot to one row per player and one column per cause
+    death_pivot = death_data.pivot(index='Player Death', columns='Cause of Death', values='Deaths')
+    # Categorical keys pivot in order of appearance; sort them by name
+    death_pivot = death_pivot.sort_index().sort_index(axis=1)
+
+    # Get players sorted by total deaths (for Y-axis ordering)
+    player_totals = death_pivot.sum(axis=1).sort_values(ascending=True)
+    death_pivot = death_pivot.loc[player_totals.index]
+
+    # Create figure
+    fig = go.Figure()
+
+    # Get unique causes for color mapping
+    all_causes = death_data['Cause of Death'].unique()
+    colors = ['#8dd3c7', '#ffffb3', '#bebada', '#fb8072', '#80b1d3', '#fdb462', '#b3de69', 
+              '#fccde5', '#d9d9d9', '#bc80bd', '#ccebc5', '#ffed6f', '#e5c494', '#b3e2cd',
+              '#fdcdac', '#cbd5e8', '#f4cae4']
+    color_map = {cause: colors[i % len(colors)] for i, cause in enumerate(all_causes)}
+
+    # One trace per cause covering every player that died to it, stacked so the
+    # most common causes overall sit closest to the axis
+    cause_order = death_pivot.sum().sort_values(ascending=False, kind='stable').index
+    for cause in cause_order:
+        cause_deaths = death_pivot[cause].dropna()
+
+        fig.add_trace(go.Bar(
+            name=cause,
+            x=cause_deaths.to_numpy(dtype=int),
+            y=cause_deaths.index,
+            orientation='h',
+            marker=dict(color=color_map[cause]),
+            text=cause,
+            textposition='inside',
+            insidetextanchor='middle',
+            textfont=dict(size=20),
+            hovertemplate='<b>%{y}</b><br>Cause: %{text}<br>Deaths: %{x}<extra></extra>',
+            legendgroup=cause
+        ))
+
+    # Update layout
+    fig.update_layout(
+        barmode='stack',
+        height=500,
+        title='Total Deaths per Player (with Causes of Death)',
+        title_font=dict(size=16),
+        xaxis_title="Number of Deaths",
+        yaxis_title="Player",
+        font=dict(size=16),
+        xaxis=dict(title_font=dict(size=18), tickfont=dict(size=14)),
+        # Keep players ordered by total deaths regardless of trace order
+        yaxis=dict(title_font=dict(size=18), tickfont=dict(size=16),
+                   categoryorder='array', categoryarray=player_totals.index.tolist()),
+        showlegend=False,
+        hovermode='closest'
+    )
+
+    return fig, {}
+
+
+def build_time_lost(stats, day, player=None):
+    """'Total Time Lost by Player' chart; with `player`, only that player's bar
+    at drill-down detail. info['aggregated'] flags the folded view and
+    info['players'] lists the players drawn; no figure without player deaths"""
+    filtered_df = stats.day_runs(day)
+
+    # Get players sorted by total time lost
+    player_totals = stats.time_lost(day)
+    if player is not None:
+        player_totals = player_totals[player_totals.index == player]
+    players = player_totals.index.tolist()
+    if not players:
+        return None, {}
+
+    # Past the bar budget, everyone below the top players shares one bar
+    other_players = players[:-(MAX_PLAYER_BARS - 1)] if len(players) > MAX_PLAYER_BARS else []
+    if other_players:
+        players = ['Other players'] + players[len(other_players):]
+
+    # Create figure
+    fig_time = go.Figure()
+
+    # Color palette for runs
+    colors = ['#e74c3c', '#c0392b', '#e67e22', '#d35400', '#f39c12', '#f1c40f', 
+              '#16a085', '#1abc9c', '#3498db', '#2980b9', '#9b59b6', '#8e44ad',
+              '#34495e', '#95a5a6', '#7f8c8d']
+
+    # Each player's runs sorted by duration (longest first) become stacked segments
+    time_segments = filtered_df.dropna(subset=['Player Death'])
+    if player is not None:
+        time_segments = time_segments[time_segments['Player Death'] == player]
+    time_segments = (
+        time_segments
+        .sort_values(['Player Death', 'Approximate Duration (Minutes)'], ascending=[True, False], kind='stable')
+        .rename(columns={'Player Death': 'Bar', 'Approximate Duration (Minutes)': 'Value'})
+        .astype({'Value': np.float64})
+    )
+    if other_players:
+        bars = time_segments['Bar'].astype(object)
+        time_segments['Bar'] = bars.where(~bars.isin(other_players), 'Other players')
+        time_segments = time_segments.sort_values(['Bar', 'Value'], ascending=[True, False], kind='stable')
+    time_segments['Position'] = time_segments.groupby('Bar', observed=True).cumcount()
+    time_segments['Label'] = 'Run ' + time_segments['Run'].astype(str)
+    time_segments['Detail'] = ''
+
+    # Too many runs to draw individually: keep the longest runs per player and
+    # fold the rest into a single "other runs" segment
+    if player is None:
+        limit, budget = MAX_DETAILED_RUNS, AGGREGATED_SEGMENTS
+    else:
+        limit = budget = MAX_DRILLDOWN_SEGMENTS
+    aggregate_time = len(time_segments) > limit
+    if aggregate_time:
+        is_other = time_segments['Position'] >= budget - 1
+        other_runs = time_segments[is_other].groupby('Bar', observed=True).agg(Value=('Value', 'sum'), Runs=('Run', 'size')).reset_index()
+        other_runs['Position'] = budget - 1
+        other_runs['Label'] = other_runs['Runs'].astype(str) + ' shorter runs'
+        other_runs['Detail'] = ''
+        time_segments = pd.concat([time_segments[~is_other], other_runs], ignore_index=True)
+
+    # Show both run number and duration if segment is large enough (>=30 minutes)
+    time_segments['Text'] = time_segments['Label'].where(
+        time_segments['Value'] < 30,
+        time_segments['Label'] + '<br>' + format_minutes(time_segments['Value']) + ' min'
+    )
+
+    add_stack_position_traces(
+        fig_time,
+        time_segments,
+        colors,
+        '<b>%{y}</b><br>%{customdata[0]}<br>Duration: %{customdata[2]} minutes<extra></extra>',
+        horizontal=True
+    )
+
+    fig_time.update_layout(
+        barmode='overlay',  # Segments carry their own stacking base
+        height=500,
+        xaxis_title="Total Minutes Lost",
+        yaxis_title="",
+        font=dict(size=16),
+        xaxis=dict(title_font=dict(size=18), tickfont=dict(size=14)),
+        yaxis=dict(title_font=dict(size=18), tickfont=dict(size=16),
+                   categoryorder='array', categoryarray=players),
+        showlegend=False,
+        hovermode='closest',
+        margin=dict(t=20, b=40, l=40, r=40)
+    )
+
+    return fig_time, {'aggregated': aggregate_time, 'players': players}
+
+
+def build_timeline(stats, day, full=False):
+    """'Run Timeline' chart; `full` draws a single day at drill-down detail.
+    info['aggregated'] flags the chunked view and info['binned'] the view
+    with several days per bar"""
+    filtered_df = stats.day_runs(day)
+
+    # Determine grouping based on filter
+    if day is None:
+        # Group by day when showing all days, binning consecutive days once
+        # there are more of them than bars
+        unique_days_timeline = np.asarray(stats.days)
+        days_per_bar = int(bin_size(len(unique_days_timeline), MAX_TIMELINE_BARS))
+        starts = np.arange(0, len(unique_days_timeline), days_per_bar)
+        ends = np.minimum(starts + days_per_bar, len(unique_days_timeline)) - 1
+        x_labels = [range_label(unique_days_timeline[first], unique_days_timeline[last], 'Day', 'Days')
+                    for first, last in zip(starts, ends)]
+        group_by_day = True
+    else:
+        # Show single bar when filtered to one day
+        x_labels = ["All Runs"]
+        group_by_day = False
+        days_per_bar = 1
+
+    # Create figure
+    fig_timeline_vert = go.Figure()
+
+    # Color palette for runs
+    colors_timeline_v = ['#e74c3c', '#c0392b', '#e67e22', '#d35400', '#f39c12', '#f1c40f', 
+                         '#16a085', '#1abc9c', '#3498db', '#2980b9', '#9b59b6', '#8e44ad',
+                         '#34495e', '#95a5a6', '#7f8c8d']
+
+    # Runs in chronological order, stacked per day (or in a single bar)
+    timeline_segments = filtered_df.sort_values('Run', kind='stable').rename(
+        columns={'Approximate Duration (Minutes)': 'Value'}
+    ).astype({'Value': np.float64})
+    if group_by_day and days_per_bar > 1:
+        bar_numbers = np.searchsorted(unique_days_timeline, timeline_segments['Day'].to_numpy()) // days_per_bar
+        timeline_segments['Bar'] = np.asarray(x_labels, dtype=object)[bar_numbers]
+    elif group_by_day:
+        timeline_segments['Bar'] = 'Day ' + timeline_segments['Day'].astype(str)
+    else:
+        timeline_segments['Bar'] = 'All Runs'
+    timeline_segments['Position'] = timeline_segments.groupby('Bar').cumcount()
+    timeline_segments['Label'] = 'Run ' + timeline_segments['Run'].astype(str)
+    timeline_segments['Detail'] = timeline_segments['Player Death'].astype(object).fillna('None')
+
+    # Too many runs to draw individually: merge consecutive runs into at most
+    # AGGREGATED_SEGMENTS chunks per bar (MAX_DRILLDOWN_SEGMENTS for a full
+    # day), keeping chronological order
+    limit, budget = (MAX_DRILLDOWN_SEGMENTS, MAX_DRILLDOWN_SEGMENTS) if full else (MAX_DETAILED_RUNS, AGGREGATED_SEGMENTS)
+    aggregate_timeline = len(timeline_segments) > limit
+    if aggregate_timeline:
+        bar_sizes = timeline_segments.groupby('Bar')['Run'].transform('size')
+        chunk_size = bin_size(bar_sizes.to_numpy(), budget)
+        timeline_segments['Position'] = timeline_segments['Position'] // chunk_size
+        timeline_segments = timeline_segments.groupby(['Bar', 'Position'], sort=False).agg(
+            Value=('Value', 'sum'), First=('Run', 'first'), Last=('Run', 'last'), Runs=('Run', 'size')
+        ).reset_index()
+        timeline_segments['Label'] = (
+            'Runs ' + timeline_segments['First'].astype(str) + '–' + timeline_segments['Last'].astype(str)
+        )
+        timeline_segments['Detail'] = timeline_segments['Runs'].astype(str) + ' runs'
+
+    # Only label segments that are large enough (>=30 minutes)
+    timeline_segments['Text'] = timeline_segments['Label'].where(timeline_segments['Value'] >= 30, '')
+
+    if group_by_day:
+        timeline_hover = '<b>%{customdata[0]}</b><br>%{x}<br>Player: %{customdata[1]}<br>Duration: %{customdata[2]} minutes<extra></extra>'
+    else:
+        timeline_hover = '<b>%{customdata[0]}</b><br>Player: %{customdata[1]}<br>Duration: %{customdata[2]} minutes<extra></extra>'
+    if aggregate_timeline:
+        timeline_hover = timeline_hover.replace('Player: ', '')
+
+    add_stack_position_traces(fig_timeline_vert, timeline_segments, colors_timeline_v, timeline_hover)
+
+    fig_timeline_vert.update_layout(
+        barmode='overlay',  # Segments carry their own stacking base
+        height=600,
+        xaxis=dict(
+            title="",
+            title_font=dict(size=18), 
+            tickfont=dict(size=14),
+            side='top',  # Move x-axis to top
+            categoryorder='array',
+            categoryarray=x_labels
+        ),
+        yaxis=dict(
+            title="Duration (Minutes)",
+            title_font=dict(size=18), 
+            tickfont=dict(size=14),
+            autorange='reversed'  # Bars go top to bottom
+        ),
+        font=dict(size=16),
+        showlegend=False,
+        hovermode='closest',
+        margin=dict(t=60, b=40, l=60, r=40)
+    )
+
+    return fig_timeline_vert, {'aggregated': aggregate_timeline, 'binned': days_per_bar > 1}
+
+
+def build_milestones(stats, day):
+    """'Time to Reach Milestone Achievements' chart; info['r2'] is the fit's R².
+
+    Reads the precomputed achievement timing model. Returns no figure when
+    fewer than 2 achievements have been completed.
+    """
+    timing = stats.timing()
+    fit = timing.fit(day)
+    if fit is None:
+        return None, {}
+    slope, intercept, r2 = fit
+
+    # Duration statistics of the completed achievements, in order
+    completed_stats = timing.achievements_for(day)
+    achievement_durations = completed_stats['Mean'].to_numpy()
+    achievement_names_completed = completed_stats.index.tolist()
+
+    # Predict for all achievements (including unachieved ones)
+    all_achievement_names = stats.achievements
+    predictions = intercept + slope * np.arange(len(all_achievement_names))
+
+    # Create visualization
+    fig_pred = go.Figure()
+
+    # Add actual data points, with the bootstrap interval of each mean
+    fig_pred.add_trace(go.Scatter(
+        x=list(range(len(achievement_durations))),
+        y=achievement_durations,
+        mode='markers',
+        name='Actual Average Duration',
+        marker=dict(size=12, color='#4CAF50'),
+        error_y=dict(
+            type='data',
+            symmetric=False,
+            array=completed_stats['CI High'].to_numpy() - achievement_durations,
+            arrayminus=achievement_durations - completed_stats['CI Low'].to_numpy(),
+            color='#81C784',
+        ),
+        customdata=completed_stats[['Median', 'CI Low', 'CI High', 'Count']].to_numpy(),
+        hovertemplate=(
+            '<b>%{text}</b><br>Average Duration: %{y:.1f} minutes'
+            '<br>95% CI: %{customdata[1]:.1f}–%{customdata[2]:.1f}'
+            '<br>Median: %{customdata[0]:.1f} minutes<br>Runs: %{customdata[3]}<extra></extra>'
+        ),
+        text=achievement_names_completed
+    ))
+
+    # Add single continuous trend line through all achievements
+    fig_pred.add_trace(go.Scatter(
+        x=list(range(len(predictions))),
+        y=predictions,
+        mode='lines',
+        name='Trend Line',
+        line=dict(color='#2196F3', width=2, dash='dash'),
+        hoverinfo='skip'
+    ))
+
+    # Add predictions for unachieved achievements
+    if len(predictions) > len(achievement_durations):
+        fig_pred.add_trace(go.Scatter(
+            x=list(range(len(achievement_durations), len(predictions))),
+            y=predictions[len(achievement_durations):],
+            mode='markers',
+            name='Predicted Duration',
+            marker=dict(size=12, color='#FF9800', symbol='diamond'),
+            hovertemplate='<b>%{text}</b><br>Predicted Duration: %{y:.1f} minutes<extra></extra>',
+            text=all_achievement_names[len(achievement_durations):]
+        ))
+
+    fig_pred.update_layout(
+        height=400,
+        xaxis_title="Achievement Progression",
+        yaxis_title="Average Duration (Minutes)",
+        font=dict(size=14),
+        xaxis=dict(
+            title_font=dict(size=16),
+            tickfont=dict(size=12),
+            tickmode='array',
+            tickvals=list(range(len(all_achievement_names))),
+            ticktext=all_achievement_names,
+            tickangle=-45
+        ),
+        yaxis=dict(title_font=dict(size=16), tickfont=dict(size=12)),
+        hovermode='closest',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(t=20, b=120, l=60, r=40)
+    )
+
+    return fig_pred, {'r2': r2}
+
+
+def build_completion(stats, day):
+    """'Milestone Achievement Completion Rates' pie chart"""
+    summary = stats.summary(day)
+    achievement_stats = stats.achievement_stats(day)
+
+    total_runs = summary['runs']
+
+    # Calculate completion rates for each achievement
+    pie_data = []
+    for idx, (ach_name, count) in enumerate(achievement_stats['Count'].items()):
+        percentage = (count / total_runs) * 100
+
+        # Mark achievements that haven't been completed yet
+        if count == 0:
+            label = f"{ach_name} *"
+        else:
+            label = ach_name
+
+        pie_data.append({
+            'Achievement': label,
+            'Count': count,
+            'Percentage': percentage,
+            'Has Data': count > 0,
+            'Order': idx  # Track achievement order
+        })
+
+    # Add "No Milestones" category - runs that didn't get any milestone achievements
+    no_ach_count = summary['no_milestone_runs']
+    no_ach_percentage = (no_ach_count / total_runs) * 100
+
+    pie_data.append({
+        'Achievement': 'No Milestone Achievements',
+        'Count': no_ach_count,
+        'Percentage': no_ach_percentage,
+        'Has Data': True,
+        'Order': -1  # Put at beginning
+    })
+
+    # Create DataFrame
+    pie_df = pd.DataFrame(pie_data)
+
+    # Create pie chart
+    fig_pie = go.Figure()
+
+    # Progressive monochrome color palette - lighter to darker
+    # Early achievements (common) = lighter, later achievements (rare) = darker
+    achievement_colors = [
+        '#B2DFDB',  # No Milestone Achievements - light teal
+        '#80CBC4',  # Acquire Hardware - light green-teal
+        '#4DB6AC',  # We Need to Go Deeper - medium green-teal
+        '#26A69A',  # A Terrible Fortress - darker green-teal
+        '#00897B',  # Into Fire - deep green-teal
+        '#00695C',  # Eye Spy - very dark green-teal
+        '#004D40',  # The End? - darkest green-teal (not achieved)
+        '#00251A'   # Free the end - extremely dark green-teal (not achieved)
+    ]
+
+    # Assign colors based on order
+    colors = []
+    for _, row in pie_df.iterrows():
+        order = row['Order']
+        if order == -1:
+            colors.append(achievement_colors[0])  # No Achievements
+        else:
+            colors.append(achievement_colors[order + 1])
+
+    fig_pie.add_trace(go.Pie(
+        labels=pie_df['Achievement'],
+        values=pie_df['Count'],
+        marker=dict(colors=colors),
+        textinfo='label+percent',
+        textfont=dict(size=14),
+        hovertemplate='<b>%{label}</b><br>Runs: %{value}<br>Percentage: %{percent}<extra></extra>'
+    ))
+
+    fig_pie.update_layout(
+        height=500,
+        font=dict(size=14),
+        showlegend=False,
+        margin=dict(t=20, b=60, l=40, r=40)
+    )
+
+    return fig_pie, {}
+
+
+def build_peak_trends(stats, day=None):
+    """'Peak Performance by Day' chart (always over all days)"""
+    trend_df = stats.trends(MAX_TREND_POINTS)
+    unique_days_trend = stats.days
+    binned = len(trend_df) < len(unique_days_trend)
+
+    fig_max = go.Figure()
+
+    # Max Duration
+    fig_max.add_trace(go.Scatter(
+        x=trend_df['Day'],
+        y=trend_df['Max Duration'],
+        mode='lines+markers',
+        name='Longest Run Duration',
+        line=dict(color='#4CAF50', width=3),
+        marker=dict(size=10)
+    ))
+
+    # Furthest Achievement
+    fig_max.add_trace(go.Scatter(
+        x=trend_df['Day'],
+        y=trend_df['Furthest Milestone Achievement'],
+        mode='lines+markers',
+        name='Furthest Milestone Achievement Reached',
+        line=dict(color='#FF9800', width=3),
+        marker=dict(size=10),
+        yaxis='y2'
+    ))
+
+    fig_max.update_layout(
+        title='Peak Performance by Day',
+        title_font=dict(size=16),
+        height=450,
+        xaxis=dict(
+            title='Day',
+            tickmode='auto' if binned else 'array',
+            tickvals=None if binned else unique_days_trend,
+            ticktext=None if binned else [f'Day {d}' for d in unique_days_trend],
+            title_font=dict(size=14),
+            tickfont=dict(size=12)
+        ),
+        yaxis=dict(
+            title='Duration (Minutes)',
+            title_font=dict(color='#4CAF50', size=14),
+            tickfont=dict(color='#4CAF50', size=11)
+        ),
+        yaxis2=dict(
+            title='Milestone Achievements',
+            title_font=dict(color='#FF9800', size=14),
+            tickfont=dict(color='#FF9800', size=11),
+            overlaying='y',
+            side='right'
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            font=dict(size=10)
+        ),
+        hovermode='x unified',
+        margin=dict(t=60, b=60, l=60, r=60)
+    )
+
+    if binned:
+        # Each point stands for several days; name them in the hover
+        fig_max.update_traces(text=trend_df['Label'], hovertemplate='%{y} (%{text})')
+
+    return fig_max, {'binned': binned}
+
+
+def build_average_trends(stats, day=None):
+    """'Average Performance by Day' chart (always over all days)"""
+    trend_df = stats.trends(MAX_TREND_POINTS)
+    unique_days_trend = stats.days
+    binned = len(trend_df) < len(unique_days_trend)
+
+    fig_avg = go.Figure()
+
+    # Average Duration
+    fig_avg.add_trace(go.Scatter(
+        x=trend_df['Day'],
+        y=trend_df['Avg Duration'],
+        mode='lines+markers',
+        name='Average Run Duration',
+        line=dict(color='#4CAF50', width=3),
+        marker=dict(size=10)
+    ))
+
+    # Average Achievements
+    fig_avg.add_trace(go.Scatter(
+        x=trend_df['Day'],
+        y=trend_df['Avg Milestone Achievements'],
+        mode='lines+markers',
+        name='Avg Milestone Achievements per Run',
+        line=dict(color='#FF9800', width=3),
+        marker=dict(size=10),
+        yaxis='y2'
+    ))
+
+    fig_avg.update_layout(
+        title='Average Performance by Day',
+        title_font=dict(size=16),
+        height=450,
+        xaxis=dict(
+            title='Day',
+            tickmode='auto' if binned else 'array',
+            tickvals=None if binned else unique_days_trend,
+            ticktext=None if binned else [f'Day {d}' for d in unique_days_trend],
+            title_font=dict(size=14),
+            tickfont=dict(size=12)
+        ),
+        yaxis=dict(
+            title='Duration (Minutes)',
+            title_font=dict(color='#4CAF50', size=14),
+            tickfont=dict(color='#4CAF50', size=11)
+        ),
+        yaxis2=dict(
+            title='Milestone Achievements',
+            title_font=dict(color='#FF9800', size=14),
+            tickfont=dict(color='#FF9800', size=11),
+            overlaying='y',
+            side='right'
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            font=dict(size=10)
+        ),
+        hovermode='x unified',
+        margin=dict(t=60, b=60, l=60, r=60)
+    )
+
+    if binned:
+        # Each point stands for several days; name them in the hover
+        fig_avg.update_traces(text=trend_df['Label'], hovertemplate='%{y} (%{text})')
+
+    return fig_avg, {'binned': binned}
+
+
+def _step_points(curve, column):
+    """(x, y) of a survival curve as a step line starting at 100% at minute 0,
+    sampled down to at most MAX_CURVE_POINTS steps"""
+    curve = curve.iloc[sample_steps(curve['Duration'])]
+    x = np.concatenate([[0.0], curve['Duration'].to_numpy()])
+    y = np.concatenate([[100.0], curve[column].to_numpy() * 100])
+    return x, y
+
+
+def build_run_survival(stats, day):
+    """'How Long Do Runs Last?' Kaplan–Meier chart with a line per player"""
+    curve = stats.survival(day)
+    fig = go.Figure()
+
+    # 95% band behind the overall curve
+    x, upper = _step_points(curve, 'Upper')
+    _, lower = _step_points(curve, 'Lower')
+    fig.add_trace(go.Scatter(
+        x=np.concatenate([x, x[::-1]]),
+        y=np.concatenate([upper, lower[::-1]]),
+        fill='toself',
+        fillcolor='rgba(76, 175, 80, 0.15)',
+        line=dict(width=0, shape='hv'),
+        hoverinfo='skip',
+        showlegend=False
+    ))
+    x, y = _step_points(curve, 'Survival')
+    fig.add_trace(go.Scatter(
+        x=x, y=y,
+        mode='lines',
+        name='All Runs',
+        line=dict(color='#4CAF50', width=3, shape='hv'),
+        hovertemplate='%{y:.1f}% of runs last longer than %{x} minutes<extra></extra>'
+    ))
+
+    # Per player: how long until that particular player dies
+    players = stats.time_lost(day).sort_values(ascending=False).index
+    colors = ['#e74c3c', '#2196F3', '#FF9800', '#9C27B0', '#795548', '#607D8B']
+    for idx, player in enumerate(players):
+        x, y = _step_points(stats.survival(day, player), 'Survival')
+        fig.add_trace(go.Scatter(
+            x=x, y=y,
+            mode='lines',
+            name=f'No death by {player}',
+            line=dict(color=colors[idx % len(colors)], width=2, dash='dash', shape='hv'),
+            hovertemplate=f'{player}: %{{y:.1f}}% chance to still be alive after %{{x}} minutes<extra></extra>'
+        ))
+
+    fig.update_layout(
+        height=450,
+        xaxis_title="Minutes into the Run",
+        yaxis_title="Runs Still Going (%)",
+        font=dict(size=14),
+        xaxis=dict(title_font=dict(size=16), tickfont=dict(size=12), rangemode='tozero'),
+        yaxis=dict(title_font=dict(size=16), tickfont=dict(size=12), range=[0, 100]),
+        hovermode='closest',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(t=20, b=40, l=60, r=40)
+    )
+    return fig, {}
+
+
+# Causes drawn individually in the hazard chart; the rest are summed
+MAX_HAZARD_CAUSES = 8
+
+
+def build_cause_hazards(stats, day):
+    """'What Ends Runs?' cumulative hazard per cause of death"""
+    hazards = stats.cause_hazards(day)
+    if hazards.shape[1] == 0:
+        return None, {}
+    hazards = hazards[hazards.iloc[-1].sort_values(ascending=False, kind='stable').index]
+    if hazards.shape[1] > MAX_HAZARD_CAUSES:
+        # Nelson–Aalen hazards add up, so the tail can be drawn as one line
+        other = hazards.iloc[:, MAX_HAZARD_CAUSES - 1:].sum(axis=1).rename('Other')
+        hazards = pd.concat([hazards.iloc[:, :MAX_HAZARD_CAUSES - 1], other], axis=1)
+
+    colors = ['#8dd3c7', '#fb8072', '#80b1d3', '#fdb462', '#b3de69', '#bc80bd', '#bebada', '#d9d9d9']
+    hazards = hazards.iloc[sample_steps(hazards.index)]
+    x = np.concatenate([[0.0], hazards.index.to_numpy(dtype=np.float64)])
+    fig = go.Figure()
+    for idx, cause in enumerate(hazards.columns):
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=np.concatenate([[0.0], hazards[cause].to_numpy()]),
+            mode='lines',
+            name=str(cause),
+            line=dict(color=colors[idx % len(colors)], width=2, shape='hv'),
+            hovertemplate=f'<b>{cause}</b><br>Cumulative hazard: %{{y:.2f}} after %{{x}} minutes<extra></extra>'
+        ))
+
+    fig.update_layout(
+        height=450,
+        xaxis_title="Minutes into the Run",
+        yaxis_title="Cumulative Hazard",
+        font=dict(size=14),
+        xaxis=dict(title_font=dict(size=16), tickfont=dict(size=12), rangemode='tozero'),
+        yaxis=dict(title_font=dict(size=16), tickfont=dict(size=12), rangemode='tozero'),
+        hovermode='closest',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(t=20, b=40, l=60, r=40)
+    )
+    return fig, {}
+
+
+# Every figure the dashboard shows, by name
+CHARTS = {
+    'deaths': build_deaths,
+    'time_lost': build_time_lost,
+    'timeline': build_timeline,
+    'milestones': build_milestones,
+    'completion': build_completion,
+    'peak_trends': build_peak_trends,
+    'average_trends': build_average_trends,
+    'run_survival': build_run_survival,
+    'cause_hazards': build_cause_hazards,
+}
+
+
+def _event_runs(stats, day):
+    """Run numbers an event chart is restricted to; None for all days of an
+    unfiltered index, which also keeps runs still in progress that aren't in
+    the sheet yet"""
+    if day is None and stats.run_filter is None:
+        return None
+    return stats.day_runs(day)['Run'].to_numpy()
+
+
+def build_milestone_times(events, stats, day):
+    """'Time to Reach Milestones' box plot from logged achievement times"""
+    distribution = events.milestone_distribution(stats.achievements, _event_runs(stats, day))
+    if distribution.empty:
+        return None, {}
+
+    fig = go.Figure(go.Box(
+        x=distribution.index.tolist(),
+        q1=distribution['Q25'],
+        median=distribution['Median'],
+        q3=distribution['Q75'],
+        lowerfence=distribution['Min'],
+        upperfence=distribution['Max'],
+        mean=distribution['Mean'],
+        boxpoints=False,
+        marker_color='#4CAF50',
+        name='Minutes into the run',
+    ))
+    fig.update_layout(
+        height=400,
+        xaxis_title="Milestone Achievement",
+        yaxis_title="Minutes into the Run",
+        font=dict(size=14),
+        xaxis=dict(title_font=dict(size=16), tickfont=dict(size=12), tickangle=-45),
+        yaxis=dict(title_font=dict(size=16), tickfont=dict(size=12)),
+        showlegend=False,
+        margin=dict(t=20, b=120, l=60, r=40)
+    )
+    return fig, {'runs': int(distribution['Count'].max())}
+
+
+def build_survival(events, stats, day):
+    """'How Long Do Runs Survive?' Kaplan–Meier curve from logged death times"""
+    survival = events.survival(_event_runs(stats, day))
+    if survival.empty:
+        return None, {}
+
+    x, y = _step_points(survival, 'Survival')
+    fig = go.Figure(go.Scatter(
+        x=x,
+        y=y,
+        mode='lines',
+        line=dict(color='#2196F3', width=2, shape='hv'),
+        fill='tozeroy',
+        hovertemplate='%{y:.1f}% of runs alive after %{x:.1f} minutes<extra></extra>',
+    ))
+    fig.update_layout(
+        height=400,
+        xaxis_title="Minutes into the Run",
+        yaxis_title="Runs Still Alive (%)",
+        font=dict(size=14),
+        xaxis=dict(title_font=dict(size=16), tickfont=dict(size=12), rangemode='tozero'),
+        yaxis=dict(title_font=dict(size=16), tickfont=dict(size=12), range=[0, 100]),
+        showlegend=False,
+        margin=dict(t=20, b=40, l=60, r=40)
+    )
+    return fig, {}
+
+
+# Charts drawn from a season's event log: builder(events, stats, day)
+EVENT_CHARTS = {
+    'milestone_times': build_milestone_times,
+    'survival': build_survival,
+}
+
+
+def build_season_comparison(seasons):
+    """Milestone completion rates side by side for several seasons.
+
+    `seasons` maps a season label to its StatsIndex. Unlike the CHARTS
+    builders this always covers all days of each season.
+    """
+    # Union of the achievement registries, in the order they first appear
+    achievement_order = []
+    for stats in seasons.values():
+        achievement_order.extend(name for name in stats.achievements if name not in achievement_order)
+
+    fig = go.Figure()
+    for label, stats in seasons.items():
+        counts = stats.achievement_stats(None)['Count'].reindex(achievement_order)
+        rates = counts / stats.summary(None)['runs'] * 100
+        fig.add_trace(go.Bar(
+            name=label,
+            x=achievement_order,
+            y=rates,
+            customdata=counts,
+            hovertemplate='<b>%{x}</b><br>' + label + ': %{y:.1f}% of runs (%{customdata:.0f})<extra></extra>'
+        ))
+
+    fig.update_layout(
+        barmode='group',
+        height=450,
+        xaxis_title="Milestone Achievement",
+        yaxis_title="Runs Reaching It (%)",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(t=40, b=60, l=60, r=20)
+    )
+    return fig, {'achievements': achievement_order}
@@ -0,0 +1,274 @@
+"""Live, incrementally refreshed view of a stats file.
+
+One LiveDataset is shared by every Streamlit session. When the file changes
+and the new sheet only adds runs at the end, the existing aggregate index is
+extended with those runs instead of being rebuilt from scratch.
+
+Refreshes are stale-while-revalidate: once a version has been published,
+sessions keep getting it immediately while the new one is loaded, indexed and
+prepared in a background thread, then swapped in with a single assignment.
+With watch() enabled that happens as soon as the file is saved; otherwise the
+first session to notice the change starts it. Only the very first load of a
+sheet is waited on, since there is nothing older to show.
+
+A PartitionedDataset covers several series: every sheet of every stats file
+is a (season, sheet) partition with its own LiveDataset and Arrow cache,
+loaded the first time it is looked at. A season can also have an event log
+(stats.ods -> stats.events.csv), ingested into an EventLog as it grows.
+"""
+import glob
+import logging
+import os
+import threading
+import time
+
+from aggregates import StatsIndex
+from events import EventLog, event_log_dir, event_log_path
+from loader import appended_rows, file_fingerprint, load_runs, sheet_problems
+from ods_reader import sheet_names
+from watcher import FileWatcher
+
+logger = logging.getLogger(__name__)
+
+
+class LiveDataset:
+    """Latest StatsIndex for one sheet (the first by default) of a stats file.
+
+    Each published index carries a `version` attribute that increases with
+    every refresh, a `fingerprint` of the file and sheet it was built from,
+    the time it was `built_at` and the `problems` (count, rows) the loader
+    found in the sheet.
+
+    `prepare(stats)`, if given, is called on every index built in the
+    background before it is published, e.g. to warm the figure cache.
+    """
+
+    def __init__(self, path='stats.ods', sheet=None, prepare=None):
+        self.path = path
+        self.sheet = sheet
+        self.prepare = prepare
+        self.fingerprint = None
+        self.stats = None
+        self.version = 0
+        # (fingerprint, message) of the last refresh that failed
+        self.error = None
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._refresher_lock = threading.Lock()
+        self._watcher = None
+
+    def watch(self, interval=1.0, debounce=0.5):
+        """Refresh in a background thread whenever the file changes"""
+        if self._watcher is None:
+            self._watcher = FileWatcher(self.path, self.refresh, interval, debounce).start()
+        return self
+
+    def current(self):
+        """Return the latest published index without waiting for a refresh.
+
+        If the file has changed since, a background refresh is started (unless
+        one is running or the same file version already failed to load). While
+        the file is missing, as when an editor saves by replacing it, the
+        published index keeps being served.
+        """
+        try:
+            fingerprint = file_fingerprint(self.path)
+        except FileNotFoundError:
+            if self.stats is None:
+                raise
+            return self.stats
+        if fingerprint == self.fingerprint:
+            return self.stats
+
+        if self.stats is None:
+            with self._lock:
+                # Another session may have loaded it while we waited for the lock
+                if self.stats is None:
+                    self._refresh(fingerprint)
+                return self.stats
+
+        if self.error is None or self.error[0] != fingerprint:
+            self._revalidate()
+        return self.stats
+
+    def refreshing(self):
+        """True while a newer version is being built in the background"""
+        refresher = self._refresher
+        return refresher is not None and refresher.is_alive()
+
+    def stale(self):
+        """True when the file has changed (or is being replaced) since the
+        published index was built"""
+        if self.stats is None:
+            return False
+        try:
+            return file_fingerprint(self.path) != self.fingerprint
+        except FileNotFoundError:
+            return True
+
+    def _revalidate(self):
+        with self._refresher_lock:
+            if not self.refreshing():
+                self._refresher = threading.Thread(
+                    target=self.refresh, name=f"refresh:{self.path}:{self.sheet}", daemon=True
+                )
+                self._refresher.start()
+
+    def refresh(self):
+        """Build, prepare and publish the index for the file as it is now, if it changed"""
+        with self._lock:
+            try:
+                fingerprint = file_fingerprint(self.path)
+            except FileNotFoundError:
+                # Mid-save; the watcher or the next viewer picks the new file up
+                return self.stats
+            if fingerprint == self.fingerprint:
+                return self.stats
+            try:
+                self._refresh(fingerprint, prepare=True)
+            except Exception as exc:
+                self.error = (fingerprint, str(exc))
+                logger.exception("Refreshing %s failed; still serving version %s", self.path, self.version)
+            return self.stats
+
+    def _refresh(self, fingerprint, prepare=False):
+        runs = load_runs(self.path, sheet=self.sheet)
+        new_rows = None if self.stats is None else appended_rows(self.stats.runs, runs)
+        if new_rows is None:
+            stats = StatsIndex(runs)
+        else:
+            stats = self.stats.appended(runs)
+        stats.version = self.version + 1
+        stats.fingerprint = fingerprint + (self.sheet,)
+        stats.problems = sheet_problems(self.path, sheet=self.sheet)
+        stats.built_at = time.time()
+        if prepare and self.prepare is not None:
+            self.prepare(stats)
+
+        # Publish: the index first, so a session that sees the new fingerprint
+        # also gets the new index
+        self.stats = stats
+        self.fingerprint = fingerprint
+        self.version = stats.version
+        self.error = None
+
+
+def season_name(path):
+    """Season label for a stats file: its file name without the extension"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+class PartitionedDataset:
+    """Every sheet of every stats file matching `pattern`, as (season, sheet) partitions.
+
+    Partitions are LiveDatasets created (and watched) on first access, so
+    switching seasons only loads the partition being switched to. `prepare`
+    is passed on to each of them.
+    """
+
+    def __init__(self, pattern='*.ods', watch=True, prepare=None):
+        self.pattern = pattern
+        self.watch = watch
+        self.prepare = prepare
+        self._sheets = {}
+        self._datasets = {}
+        self._event_logs = {}
+        self._lock = threading.Lock()
+        self._events_lock = threading.Lock()
+        self._listers = {}
+        self._listers_lock = threading.Lock()
+
+    def partitions(self):
+        """(season, sheet) keys in file then sheet order. A loaded file that is
+        momentarily missing, say while an editor replaces it, keeps its
+        partitions"""
+        keys = []
+        for path in sorted(set(glob.glob(self.pattern)) | set(self._published_paths())):
+            keys.extend((season_name(path), sheet) for sheet in self._sheet_names(path))
+        return keys
+
+    def _published_paths(self):
+        return [dataset.path for dataset in list(self._datasets.values()) if dataset.stats is not None]
+
+    def _sheet_names(self, path):
+        # Listed once per file version. Listing parses the whole workbook, so
+        # after a save the old list is served while a background thread lists
+        # the new one; only a file never listed before is waited on
+        cached = self._sheets.get(path)
+        try:
+            fingerprint = file_fingerprint(path)
+        except FileNotFoundError:
+            return [] if cached is None else cached[1]
+        if cached is None:
+            cached = (fingerprint, sheet_names(path))
+            self._sheets[path] = cached
+        elif cached[0] != fingerprint:
+            self._relist(path)
+        return cached[1]
+
+    def _relist(self, path):
+        with self._listers_lock:
+            lister = self._listers.get(path)
+            if lister is None or not lister.is_alive():
+                lister = threading.Thread(target=self._list_sheets, args=(path,), name=f"sheets:{path}", daemon=True)
+                self._listers[path] = lister
+                lister.start()
+
+    def _list_sheets(self, path):
+        try:
+            fingerprint = file_fingerprint(path)
+        except FileNotFoundError:
+            return
+        try:
+            names = sheet_names(path)
+        except Exception:
+            # Keep the old list for this file version; the next save retries
+            logger.exception("Listing the sheets of %s failed", path)
+            names = self._sheets[path][1]
+        self._sheets[path] = (fingerprint, names)
+
+    def _path(self, season):
+        for path in glob.glob(self.pattern) + self._published_paths():
+            if season_name(path) == season:
+                return path
+        raise FileNotFoundError(f"No stats file for season '{season}'")
+
+    def get(self, season, sheet):
+        """LiveDataset for one partition, created on first use"""
+        key = (season, sheet)
+        dataset = self._datasets.get(key)
+        if dataset is None:
+            with self._lock:
+                dataset = self._datasets.get(key)
+                if dataset is None:
+                    dataset = LiveDataset(self._path(season), sheet, self.prepare)
+                    if self.watch:
+                        dataset.watch()
+                    self._datasets[key] = dataset
+        return dataset
+
+    def events(self, season):
+        """EventIndex of the season's event log, or None if it has none.
+
+        Lines added to the CSV since the last call are ingested first; that is
+        proportional to what was added, not to the size of the log.
+        """
+        path = event_log_path(self._path(season))
+        try:
+            fingerprint = file_fingerprint(path)
+        except FileNotFoundError:
+            return None
+        entry = self._event_logs.get(path)
+        if entry is None or entry[1] != fingerprint:
+            with self._events_lock:
+                entry = self._event_logs.get(path)
+                if entry is None or entry[1] != fingerprint:
+                    log = EventLog(event_log_dir(path)) if entry is None else entry[0]
+                    log.ingest(path)
+                    entry = (log, fingerprint)
+                    self._event_logs[path] = entry
+        return entry[0].index
+
+    def loaded(self):
+        """Partitions that have been loaded so far"""
+        return list(self._datasets)
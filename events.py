@@ -0,0 +1,393 @@
+"""Append-only log of timestamped per-run events.
+
+The stats sheet has one approximate duration per run and the achievements it
+ended with. An event log records when things happened within each run, as a
+CSV file with one event per line:
+
+    Run,Minute,Event,Name,Player
+    88,3.5,achievement,Acquire Hardware,
+    88,41,achievement,We Need to Go Deeper,
+    88,52.2,death,Lava,Filian
+
+`Minute` is the time since the run started. `Event` is `achievement` (Name
+is the achievement), `death` (Name is the cause, Player who died) or `end`
+(the run stopped without a death, e.g. the stream ended).
+
+Ingested events are stored as uncompressed Arrow IPC segment files next to a
+JSON manifest. Segments are only ever added (or merged into one when there
+get to be too many), each is sorted by run and minute and memory-mapped when
+read. Only the part of the CSV added since the last ingest is parsed.
+
+An EventIndex keeps small per-run tables (first minute each achievement was
+reached, the death, the last minute seen). Adding a segment aggregates just
+that segment and merges it in, so queries never rescan the log.
+"""
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from loader import CACHE_DIR, write_atomic
+from survival import exit_counts, kaplan_meier
+
+# Bump whenever the segment layout changes so old logs are re-ingested
+LOG_VERSION = 1
+
+EVENT_TYPES = ['achievement', 'death', 'end']
+EVENT_COLUMNS = ['Run', 'Minute', 'Event', 'Name', 'Player']
+EVENT_SCHEMA = pa.schema([
+    ('Run', pa.int32()),
+    ('Minute', pa.float32()),
+    ('Event', pa.dictionary(pa.int8(), pa.string())),
+    ('Name', pa.dictionary(pa.int32(), pa.string())),
+    ('Player', pa.dictionary(pa.int32(), pa.string())),
+])
+# Index levels of the per-run tables saved next to the segments
+_INDEX_LEVELS = {'milestones': ['Run', 'Name'], 'deaths': ['Run'], 'last_seen': ['Run']}
+# Segments are merged into one once there are more than this many
+MAX_SEGMENTS = 64
+# CSV lines parsed per batch when ingesting
+CSV_CHUNK_ROWS = 100_000
+
+
+def event_log_path(path):
+    """Event log CSV belonging to a stats file: stats.ods -> stats.events.csv"""
+    return os.path.splitext(path)[0] + '.events.csv'
+
+
+def validate_events(raw):
+    """Coerce a parsed batch to the event columns.
+
+    Returns `(events, dropped)`: rows without a whole non-negative Run, a
+    non-negative Minute, a known Event, or a Name for achievements and deaths
+    are dropped and counted.
+    """
+    missing_columns = [col for col in EVENT_COLUMNS[:3] if col not in raw.columns]
+    if missing_columns:
+        raise ValueError(f"Event log is missing required columns: {', '.join(missing_columns)}")
+
+    run = pd.to_numeric(raw['Run'], errors='coerce')
+    minute = pd.to_numeric(raw['Minute'], errors='coerce')
+    event = raw['Event'].astype('string').str.strip().str.lower()
+    name = raw['Name'].astype('string').str.strip() if 'Name' in raw.columns else pd.Series(pd.NA, index=raw.index, dtype='string')
+    player = raw['Player'].astype('string').str.strip() if 'Player' in raw.columns else pd.Series(pd.NA, index=raw.index, dtype='string')
+
+    keep = (
+        (run >= 0) & (run % 1 == 0) & (run <= np.iinfo(np.int32).max)
+        & (minute >= 0)
+        & event.isin(EVENT_TYPES).fillna(False)
+        & ((event == 'end') | name.notna()).fillna(False)
+    ).to_numpy(dtype=bool)
+
+    events = pd.DataFrame({
+        'Run': run[keep].astype(np.int32).to_numpy(),
+        'Minute': minute[keep].astype(np.float32).to_numpy(),
+        'Event': event[keep].to_numpy(dtype=object),
+        'Name': name[keep].to_numpy(dtype=object, na_value=None),
+        'Player': player[keep].to_numpy(dtype=object, na_value=None),
+    })
+    return events, int((~keep).sum())
+
+
+def _to_table(events):
+    events = events.sort_values(['Run', 'Minute'], kind='stable')
+    return pa.Table.from_pandas(events, preserve_index=False).cast(EVENT_SCHEMA)
+
+
+def _aggregate(table):
+    """Per-run tables for one segment"""
+    events = table.to_pandas()
+    event = events['Event'].astype(object)
+    reached = events[event == 'achievement']
+    deaths = events[event == 'death']
+    return {
+        # First minute each (run, achievement) was reached
+        'milestones': reached.groupby(['Run', reached['Name'].astype(object)])['Minute'].min(),
+        # First death of each run
+        'deaths': deaths.sort_values(['Run', 'Minute'], kind='stable').groupby('Run').first()[['Minute', 'Name', 'Player']]
+                  .rename(columns={'Name': 'Cause'}).astype({'Cause': object, 'Player': object}),
+        # Last minute anything was logged for each run
+        'last_seen': events.groupby('Run')['Minute'].max(),
+    }
+
+
+# How rows for the same run are combined when segments are merged
+_COMBINE = {
+    'milestones': lambda table: table.groupby(level=[0, 1]).min(),
+    'deaths': lambda table: table.sort_values('Minute', kind='stable').groupby(level=0).first(),
+    'last_seen': lambda table: table.groupby(level=0).max(),
+}
+
+
+def _merge(old, new):
+    """Merge per-run tables, both sorted by run.
+
+    Only the old rows from the new segment's first run onwards are combined
+    with it; events usually arrive in run order, so that is a handful of rows
+    rather than every run seen so far.
+    """
+    merged = {}
+    for name, combine in _COMBINE.items():
+        if len(new[name]) == 0:
+            merged[name] = old[name]
+            continue
+        runs = old[name].index.get_level_values(0)
+        split = runs.searchsorted(new[name].index.get_level_values(0).min())
+        tail = combine(pd.concat([old[name].iloc[split:], new[name]]))
+        merged[name] = pd.concat([old[name].iloc[:split], tail])
+    return merged
+
+
+class EventIndex:
+    """Read-only view of an event log at one version.
+
+    `fingerprint` identifies the version; an index is never modified, adding a
+    segment produces a new one.
+    """
+
+    def __init__(self, fingerprint, segments=(), tables=None):
+        self.fingerprint = fingerprint
+        self.segments = list(segments)
+        # Run column of each segment, for binary search
+        self._segment_runs = [segment.column('Run').to_numpy() for segment in self.segments]
+        if tables is None:
+            tables = {
+                'milestones': pd.Series(dtype=np.float32, index=pd.MultiIndex.from_arrays([np.array([], dtype=np.int32), np.array([], dtype=object)], names=['Run', 'Name']), name='Minute'),
+                'deaths': pd.DataFrame({'Minute': pd.Series(dtype=np.float32), 'Cause': pd.Series(dtype=object), 'Player': pd.Series(dtype=object)}, index=pd.Index([], name='Run', dtype=np.int32)),
+                'last_seen': pd.Series(dtype=np.float32, index=pd.Index([], name='Run', dtype=np.int32), name='Minute'),
+            }
+        self.milestones = tables['milestones']
+        self.deaths = tables['deaths']
+        self.last_seen = tables['last_seen']
+
+    def appended(self, fingerprint, segment):
+        """Index with one more segment; only that segment is aggregated"""
+        tables = _merge(self._tables(), _aggregate(segment))
+        return EventIndex(fingerprint, self.segments + [segment], tables)
+
+    def _tables(self):
+        return {'milestones': self.milestones, 'deaths': self.deaths, 'last_seen': self.last_seen}
+
+    @property
+    def runs(self):
+        """Runs with at least one event"""
+        return self.last_seen.index
+
+    def __len__(self):
+        return sum(segment.num_rows for segment in self.segments)
+
+    # ---------- queries ----------
+
+    def run_events(self, run):
+        """Every event of one run, in time order"""
+        parts = []
+        for segment, runs in zip(self.segments, self._segment_runs):
+            start, stop = np.searchsorted(runs, [run, run + 1])
+            if stop > start:
+                parts.append(segment.slice(start, stop - start))
+        if not parts:
+            return _to_table(pd.DataFrame(columns=EVENT_COLUMNS)).to_pandas()
+        events = pa.concat_tables(parts).to_pandas()
+        return events.sort_values('Minute', kind='stable', ignore_index=True)
+
+    def _select(self, table, runs):
+        if runs is None:
+            return table
+        return table[table.index.get_level_values('Run').isin(runs)]
+
+    def time_to_milestone(self, achievement, runs=None):
+        """Minutes into the run at which `achievement` was first reached, one per run"""
+        milestones = self._select(self.milestones, runs)
+        return milestones[milestones.index.get_level_values('Name') == achievement].to_numpy()
+
+    def milestone_distribution(self, achievements, runs=None):
+        """Count and minute quantiles of reaching each achievement, in the given
+        order, for achievements reached at least once"""
+        milestones = self._select(self.milestones, runs)
+        if milestones.empty:
+            return pd.DataFrame(columns=['Count', 'Min', 'Mean', 'Max', 'Q25', 'Median', 'Q75'], dtype=np.float64)
+        grouped = milestones.astype(np.float64).groupby(level='Name')
+        table = grouped.agg(['size', 'min', 'mean', 'max'])
+        table.columns = ['Count', 'Min', 'Mean', 'Max']
+        quantiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+        quantiles.columns = ['Q25', 'Median', 'Q75']
+        table = table.join(quantiles)
+        return table.reindex([name for name in achievements if name in table.index])
+
+    def survival(self, runs=None):
+        """Kaplan–Meier curve of the logged runs by minute of death.
+
+        Runs without a logged death are censored at the last minute anything
+        was logged for them.
+        """
+        last_seen = self._select(self.last_seen, runs)
+        deaths = self.deaths['Minute'].reindex(last_seen.index)
+        exits = exit_counts(deaths.fillna(last_seen), deaths.notna())
+        return kaplan_meier(exits['Exits'], exits['Deaths'])
+
+
+class EventLog:
+    """Segment files and manifest of one event log in `directory`.
+
+    `index` is the EventIndex for everything appended so far.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = self._read_manifest()
+        self.index = EventIndex(self._fingerprint())
+        try:
+            segments = [self._read_segment(entry['file']) for entry in self.manifest['segments']]
+            if self.manifest.get('index_generation') == self.manifest['generation']:
+                self.index = EventIndex(self._fingerprint(), segments, self._read_index())
+            else:
+                for segment in segments:
+                    self.index = self.index.appended(self._fingerprint(), segment)
+        except (OSError, pa.ArrowInvalid):
+            # A segment went missing or is damaged: ingest the sources again
+            self.reset()
+
+    @property
+    def _manifest_path(self):
+        return os.path.join(self.directory, 'log.json')
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        if manifest is None or manifest.get('version') != LOG_VERSION:
+            manifest = {'version': LOG_VERSION, 'generation': 0, 'next_segment': 0, 'segments': [], 'sources': {}}
+        return manifest
+
+    def _write_manifest(self):
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f)
+        write_atomic(self._manifest_path, write)
+
+    def _read_index(self):
+        """Per-run tables saved by the last commit, so reopening the log doesn't aggregate it again"""
+        tables = {}
+        for name, levels in _INDEX_LEVELS.items():
+            path = os.path.join(self.directory, f'{name}.arrow')
+            tables[name] = feather.read_table(path, memory_map=True).to_pandas().set_index(levels)
+        tables['milestones'] = tables['milestones']['Minute']
+        tables['last_seen'] = tables['last_seen']['Minute']
+        return tables
+
+    def _commit(self):
+        """Save the per-run tables, then the manifest that points at them"""
+        os.makedirs(self.directory, exist_ok=True)
+        for name, table in self.index._tables().items():
+            frame = table.reset_index()
+            write_atomic(os.path.join(self.directory, f'{name}.arrow'),
+                         lambda tmp_path: feather.write_feather(frame, tmp_path, compression='uncompressed'))
+        self.manifest['index_generation'] = self.manifest['generation']
+        self._write_manifest()
+
+    def _fingerprint(self):
+        return (os.path.abspath(self.directory), self.manifest['generation'])
+
+    def _read_segment(self, name):
+        return feather.read_table(os.path.join(self.directory, name), memory_map=True)
+
+    def _write_segment(self, table):
+        name = f"segment-{self.manifest['next_segment']:06d}.arrow"
+        self.manifest['next_segment'] += 1
+        write_atomic(os.path.join(self.directory, name),
+                     lambda tmp_path: feather.write_feather(table, tmp_path, compression='uncompressed'))
+        return name
+
+    def append(self, events):
+        """Validate and store a batch of events; returns how many rows were dropped"""
+        events, dropped = validate_events(events)
+        if len(events):
+            self._add_segment(_to_table(events))
+            self._commit()
+        return dropped
+
+    def _add_segment(self, table):
+        os.makedirs(self.directory, exist_ok=True)
+        name = self._write_segment(table)
+        self.manifest['segments'].append({'file': name, 'rows': table.num_rows})
+        self.manifest['generation'] += 1
+        # The manifest is written by the caller; a segment it doesn't list is ignored
+        self.index = self.index.appended(self._fingerprint(), self._read_segment(name))
+        if len(self.manifest['segments']) > MAX_SEGMENTS:
+            self._compact()
+
+    def _compact(self):
+        """Merge every segment into one, sorted by run"""
+        old = [entry['file'] for entry in self.manifest['segments']]
+        table = pa.concat_tables(self.index.segments).to_pandas()
+        merged = _to_table(table)
+        name = self._write_segment(merged)
+        self.manifest['segments'] = [{'file': name, 'rows': merged.num_rows}]
+        self.manifest['generation'] += 1
+        self.index = EventIndex(self._fingerprint(), [self._read_segment(name)], self.index._tables())
+        self._commit()
+        for file in old:
+            try:
+                os.remove(os.path.join(self.directory, file))
+            except OSError:
+                pass
+
+    def reset(self):
+        """Drop every segment, e.g. when the source file was rewritten"""
+        for entry in self.manifest['segments']:
+            try:
+                os.remove(os.path.join(self.directory, entry['file']))
+            except OSError:
+                pass
+        generation = self.manifest['generation'] + 1
+        self.manifest = {'version': LOG_VERSION, 'generation': generation, 'next_segment': 0, 'segments': [], 'sources': {}}
+        self.index = EventIndex(self._fingerprint())
+
+    def ingest(self, path):
+        """Append the lines added to the CSV at `path` since the last ingest.
+
+        The byte offset read up to is kept in the manifest; a trailing line
+        without a newline is left for the next ingest. If the file got shorter
+        or its header changed, the log is rebuilt from scratch. Returns how
+        many rows were dropped.
+        """
+        source = os.path.abspath(path)
+        with open(path, 'rb') as f:
+            header = f.readline()
+            state = self.manifest['sources'].get(source)
+            size = os.fstat(f.fileno()).st_size
+            if state is not None and (state['header'] != header.decode('utf-8') or size < state['offset']):
+                self.reset()
+                state = None
+            offset = len(header) if state is None else state['offset']
+            f.seek(offset)
+            tail = f.read()
+
+        complete = tail[:tail.rfind(b'\n') + 1]
+        dropped = 0
+        if complete:
+            reader = pd.read_csv(io.BytesIO(header + complete), chunksize=CSV_CHUNK_ROWS, dtype=str, keep_default_na=False, na_values=[''])
+            for chunk in reader:
+                events, chunk_dropped = validate_events(chunk)
+                dropped += chunk_dropped
+                if len(events):
+                    self._add_segment(_to_table(events))
+
+        self.manifest['sources'][source] = {
+            'header': header.decode('utf-8'),
+            'offset': offset + len(complete),
+            'dropped': dropped + (state or {}).get('dropped', 0),
+        }
+        self._commit()
+        return dropped
+
+
+def event_log_dir(path, cache_dir=CACHE_DIR):
+    """Directory of the ingested log for an event CSV"""
+    return os.path.join(cache_dir, 'events', os.path.basename(path).removesuffix('.events.csv'))
@@ -0,0 +1,181 @@
+"""Bake the dashboard into static files.
+
+Renders every view (All Days plus each Day N) with the same chart builders the
+app uses and writes one folder per view containing each figure as Plotly JSON,
+a summary.json and a standalone index.html. Views are built in parallel across
+processes. The result can be served by any static file server, for example:
+
+    python export.py --output dist
+    python export.py --output dist --serve 8000
+"""
+import argparse
+import functools
+import html
+import http.server
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from aggregates import StatsIndex
+from charts import CHARTS
+from loader import load_runs
+
+# Charts that only make sense across all days
+ALL_DAYS_ONLY = {'peak_trends', 'average_trends'}
+
+_worker_stats = None
+
+
+def view_slug(day):
+    return 'all-days' if day is None else f'day-{day}'
+
+
+def view_title(day):
+    return 'All Days' if day is None else f'Day {day}'
+
+
+def _jsonable(value):
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _init_worker(path):
+    # Each worker loads (from the Arrow cache) and indexes the data once
+    global _worker_stats
+    _worker_stats = StatsIndex(load_runs(path))
+
+
+def _render_page(day, summary, figures):
+    title = f"Neuro Hardcore Minecraft Stats – {view_title(day)}"
+    metrics = ''.join(
+        f"<div class='metric'><div class='label'>{label}</div><div class='value'>{html.escape(str(value))}</div></div>"
+        for label, value in (
+            ('Total Time Played', f"{int(summary['total_duration']):,} min"),
+            ('Average Run Duration', f"{int(summary['avg_duration'])} min"),
+            ('Completion Run Duration', f"{int(summary['final_run_duration'])} min"),
+            ('Most Common Death', summary['most_common_death'] or '—'),
+        )
+    )
+    charts = ''.join(
+        pio.to_html(fig, full_html=False, include_plotlyjs=False, default_width='100%')
+        for fig in figures
+    )
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<script src="../plotly.min.js"></script>
+<style>
+body {{ background: #0e1117; color: white; font-family: sans-serif; margin: 0 40px; }}
+.metrics {{ display: flex; gap: 20px; margin: 30px 0; }}
+.metric {{ flex: 1; text-align: center; padding: 20px; background: #1b1d22; border-radius: 10px; }}
+.label {{ color: rgba(255, 255, 255, 0.7); }}
+.value {{ font-size: 32px; font-weight: bold; margin-top: 10px; }}
+</style>
+</head>
+<body>
+<h1 style="text-align: center;">{html.escape(title)}</h1>
+<p><a href="../index.html" style="color: #80b1d3;">All views</a></p>
+<div class="metrics">{metrics}</div>
+{charts}
+</body>
+</html>
+"""
+
+
+def render_view(day, output):
+    """Render one view into `output`/<slug>/ and return its manifest entry"""
+    started = time.perf_counter()
+    view_dir = os.path.join(output, view_slug(day))
+    os.makedirs(view_dir, exist_ok=True)
+
+    summary = _worker_stats.summary(day)
+    with open(os.path.join(view_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, default=_jsonable)
+
+    charts = {}
+    figures = []
+    for name, build in CHARTS.items():
+        if day is not None and name in ALL_DAYS_ONLY:
+            continue
+        fig, info = build(_worker_stats, day)
+        if fig is None:
+            continue
+        with open(os.path.join(view_dir, f'{name}.json'), 'w', encoding='utf-8') as f:
+            f.write(fig.to_json())
+        charts[name] = info
+        figures.append(fig)
+
+    with open(os.path.join(view_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(_render_page(day, summary, figures))
+
+    return {
+        'view': view_title(day),
+        'path': view_slug(day),
+        'charts': charts,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def export(path='stats.ods', output='dist', workers=None):
+    """Render every view of `path` into `output` and return the manifest"""
+    os.makedirs(output, exist_ok=True)
+    days = StatsIndex(load_runs(path)).days
+    views = [None] + days
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path,)) as pool:
+        entries = list(pool.map(render_view, views, [output] * len(views)))
+
+    # Ship plotly.js once so the bundle works without network access
+    with open(os.path.join(output, 'plotly.min.js'), 'w', encoding='utf-8') as f:
+        f.write(get_plotlyjs())
+
+    links = ''.join(f"<li><a href='{e['path']}/index.html'>{e['view']}</a></li>" for e in entries)
+    with open(os.path.join(output, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Neuro Hardcore Minecraft Stats</title>"
+                f"</head><body><h1>Neuro Hardcore Minecraft Stats</h1><ul>{links}</ul></body></html>")
+
+    manifest = {
+        'source': os.path.abspath(path),
+        'generated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'views': entries,
+    }
+    with open(os.path.join(output, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, default=_jsonable)
+    return manifest
+
+
+def serve(output, port, host='127.0.0.1'):
+    """Serve an exported bundle as static files"""
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=output)
+    with http.server.ThreadingHTTPServer((host, port), handler) as server:
+        print(f"Serving {output} at http://{host or 'localhost'}:{port}")
+        server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the stats dashboard as static JSON/HTML")
+    parser.add_argument('--data', default='stats.ods', help="stats file to export (default: stats.ods)")
+    parser.add_argument('--output', default='dist', help="output directory (default: dist)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--serve', type=int, metavar='PORT', help="serve the output directory after exporting")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="address to serve on (default: 127.0.0.1; 0.0.0.0 for every interface)")
+    args = parser.parse_args()
+
+    manifest = export(args.data, args.output, args.workers)
+    for entry in manifest['views']:
+        print(f"{entry['view']}: {len(entry['charts'])} charts in {entry['seconds']}s")
+
+    if args.serve:
+        serve(args.output, args.serve, args.host)
+
+
+if __name__ == '__main__':
+    main()
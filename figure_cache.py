@@ -0,0 +1,47 @@
+"""Process-wide cache of serialized dashboard figures.
+
+Figures are stored as Plotly JSON keyed on (data fingerprint, day, chart name),
+so every session looking at the same data and day filter reuses one build.
+Event log charts add the event log's fingerprint to the key, and builder
+options such as a drill-down player add theirs.
+Entries are evicted least-recently-used first once their total size exceeds a
+byte budget.
+"""
+from charts import CHARTS, EVENT_CHARTS
+from lru import SizedLRU
+
+
+class FigureCache(SizedLRU):
+    """LRU cache of `(figure JSON or None, info)` per (fingerprint, day, chart)"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        super().__init__(max_bytes)
+
+    def get(self, stats, day, name, events=None, **options):
+        """Serialized figure for one chart, building it on a miss; `events`
+        selects a chart from EVENT_CHARTS drawn from that EventIndex and
+        `options` are passed on to the builder"""
+        if events is None:
+            key = (stats.fingerprint, day, name)
+        else:
+            key = (stats.fingerprint, events.fingerprint, day, name)
+        if options:
+            key += tuple(sorted(options.items()))
+
+        def build():
+            if events is None:
+                fig, info = CHARTS[name](stats, day, **options)
+            else:
+                fig, info = EVENT_CHARTS[name](events, stats, day, **options)
+            return (None if fig is None else fig.to_json()), info
+
+        return self.get_or_build(key, build, size=lambda entry: len(entry[0] or ''))
+
+    def warm(self, stats, days=None):
+        """Build every chart ahead of the first viewer, by default for all days
+        and for the latest day"""
+        if days is None:
+            days = [None] + stats.days[-1:]
+        for day in days:
+            for name in CHARTS:
+                self.get(stats, day, name)
@@ -0,0 +1,130 @@
+"""Multi-dimensional run filters.
+
+A RunFilter combines any of: a range of days, players, causes of death,
+achievements that must have been reached and a range of run durations. A
+FilterIndex resolves it to row positions without scanning the runs table
+column by column:
+
+- players, causes and achievements have one packed bitmap (a bit per run) per
+  value, built once; values within a dimension are OR-ed together,
+- days and durations keep the row order sorted by value, so a range is two
+  binary searches and one scatter into a bitmap,
+
+and the dimensions are then AND-ed together, a few operations over n/8 bytes.
+StatsIndex.select() turns the result into an index of its own, which every
+chart takes like the full one.
+"""
+import numpy as np
+
+from loader import ACHIEVEMENT_MASK, DURATION
+
+
+class RunFilter:
+    """Runs matching every given dimension; None leaves a dimension open.
+
+    `days` and `duration` are inclusive (low, high) ranges, either end of
+    which may be None; `players` and `causes` match any of the listed names;
+    `achievements` must all have been reached.
+    """
+
+    def __init__(self, days=None, players=None, causes=None, achievements=None, duration=None):
+        self.days = None if days is None else tuple(days)
+        self.players = None if players is None else tuple(sorted(players))
+        self.causes = None if causes is None else tuple(sorted(causes))
+        self.achievements = None if achievements is None else tuple(sorted(achievements))
+        self.duration = None if duration is None else tuple(duration)
+
+    def key(self):
+        """Hashable form, for cache keys"""
+        return (self.days, self.players, self.causes, self.achievements, self.duration)
+
+    def __eq__(self, other):
+        return isinstance(other, RunFilter) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __bool__(self):
+        return any(value is not None for value in self.key())
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={value!r}" for name, value in zip(
+            ('days', 'players', 'causes', 'achievements', 'duration'), self.key()) if value is not None)
+        return f"RunFilter({fields})"
+
+
+def _bitmaps(codes, count):
+    """Packed bitmap of the rows holding each code in 0..count-1"""
+    return [np.packbits(codes == code) for code in range(count)]
+
+
+def _sorted(values):
+    """(row positions sorted by value, the sorted values), missing values left out"""
+    values = np.asarray(values, dtype=np.float64)
+    present = np.flatnonzero(~np.isnan(values))
+    order = present[np.argsort(values[present], kind='stable')]
+    return order, values[order]
+
+
+class FilterIndex:
+    """Per-dimension bitmaps and sort orders over a runs table"""
+
+    def __init__(self, runs, achievements):
+        self.rows = len(runs)
+        self._categories = {}
+        for name, column in (('players', 'Player Death'), ('causes', 'Cause of Death')):
+            values = runs[column]
+            self._categories[name] = (
+                {value: code for code, value in enumerate(values.cat.categories)},
+                _bitmaps(values.cat.codes.to_numpy(), len(values.cat.categories)),
+            )
+        masks = runs[ACHIEVEMENT_MASK].to_numpy()
+        self._achievements = {
+            name: np.packbits(((masks >> bit) & 1) == 1) for bit, name in enumerate(achievements)
+        }
+        self._ranges = {'days': _sorted(runs['Day']), 'duration': _sorted(runs[DURATION])}
+
+    def _none(self):
+        return np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+
+    def _any_of(self, dimension, names):
+        codes, bitmaps = self._categories[dimension]
+        selected = self._none()
+        for name in names:
+            if name in codes:
+                selected |= bitmaps[codes[name]]
+        return selected
+
+    def _range(self, dimension, bounds):
+        order, values = self._ranges[dimension]
+        low, high = bounds
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        stop = len(values) if high is None else np.searchsorted(values, high, side='right')
+        selected = np.zeros(self.rows, dtype=bool)
+        selected[order[start:stop]] = True
+        return np.packbits(selected)
+
+    def bitmap(self, run_filter):
+        """Packed bitmap of the runs matching `run_filter`"""
+        parts = []
+        if run_filter.days is not None:
+            parts.append(self._range('days', run_filter.days))
+        if run_filter.duration is not None:
+            parts.append(self._range('duration', run_filter.duration))
+        for dimension in ('players', 'causes'):
+            names = getattr(run_filter, dimension)
+            if names is not None:
+                parts.append(self._any_of(dimension, names))
+        for name in run_filter.achievements or ():
+            parts.append(self._achievements.get(name, self._none()))
+
+        if not parts:
+            return np.packbits(np.ones(self.rows, dtype=bool))
+        selected = parts[0].copy()
+        for part in parts[1:]:
+            selected &= part
+        return selected
+
+    def positions(self, run_filter):
+        """Row positions of the runs matching `run_filter`, in table order"""
+        return np.flatnonzero(np.unpackbits(self.bitmap(run_filter), count=self.rows))
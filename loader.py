@@ -0,0 +1,380 @@
+"""Loading of the run stats spreadsheet through a columnar on-disk cache.
+
+Parsing stats.ods is slow, so the parsed table is written once to an
+uncompressed Arrow IPC (Feather v2) file next to a small JSON manifest. Later
+loads memory-map that file and only go back to the ODS when it has changed.
+Each sheet of a workbook is cached separately. The sheet is parsed with the
+streaming reader in ods_reader and written to the cache batch by batch, so
+building the cache never holds more than one batch of parsed rows.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from ods_reader import iter_batches, read_sheet
+
+CACHE_DIR = '.cache'
+
+# Bump whenever the layout of the cached table changes so old caches are rebuilt
+CACHE_VERSION = 3
+
+ACHIEVEMENT_PREFIX = 'Achievement: '
+# Packed per-run achievement flags; bit i is achievement i of the registry
+ACHIEVEMENT_MASK = 'Achievements'
+
+DURATION = 'Approximate Duration (Minutes)'
+# Required numeric columns and the compact types they are stored as
+RUN_SCHEMA = {
+    'Run': np.int32,
+    'Day': np.int16,
+    DURATION: np.float32,
+}
+# Text columns with few distinct values, loaded as categoricals
+CATEGORY_COLUMNS = ['Player Death', 'Cause of Death']
+# Problems kept in the cache manifest; the total is always counted
+MAX_REPORTED_PROBLEMS = 1000
+
+
+def file_fingerprint(path):
+    """Cheap stat-based key for a data file: (absolute path, size, mtime)"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def content_hash(path):
+    """SHA-256 of the file contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _mask_dtype(count):
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if count <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"Too many achievement columns to pack: {count}")
+
+
+def pack_achievements(data):
+    """Replace the 'Achievement: ...' flag columns with a single bitmask column.
+
+    The ordered achievement names (the registry) are kept in
+    data.attrs['achievements'], which survives slicing and the Arrow cache.
+    """
+    achievement_cols = [col for col in data.columns if col.startswith(ACHIEVEMENT_PREFIX)]
+    dtype = _mask_dtype(len(achievement_cols))
+    bits = np.left_shift(np.uint64(1), np.arange(len(achievement_cols), dtype=np.uint64))
+    flags = (data[achievement_cols] == True).to_numpy(dtype=np.uint64)
+
+    packed = data.drop(columns=achievement_cols)
+    packed[ACHIEVEMENT_MASK] = (flags @ bits).astype(dtype)
+    packed.attrs['achievements'] = [col[len(ACHIEVEMENT_PREFIX):] for col in achievement_cols]
+    return packed
+
+
+def _as_text(value):
+    """Cell value as the text it shows, e.g. 404 rather than 404.0"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def validate_runs(raw, offset=0):
+    """Check one parsed batch against the runs schema and coerce it to it.
+
+    Returns `(runs, problems)`. Rows whose Run, Day or duration is missing,
+    not a number, not whole (Run and Day), negative or too large for its
+    column type are dropped. Achievement cells that are neither true nor
+    false are kept and read as not reached, and player or cause cells that
+    aren't text (a cause typed as 404) are kept as their text. Each problem
+    is a dict with the data row (1-based, `offset` rows into the sheet), the
+    Run, the column, the offending value and what is wrong with it.
+    """
+    missing_columns = [col for col in RUN_SCHEMA if col not in raw.columns]
+    if missing_columns:
+        raise ValueError(f"Sheet is missing required columns: {', '.join(missing_columns)}")
+
+    problems = []
+    drop = np.zeros(len(raw), dtype=bool)
+    columns = {}
+
+    def report(mask, col, issue):
+        for position in np.flatnonzero(mask):
+            problems.append({
+                'Row': offset + int(position) + 1,
+                'Run': raw['Run'].iloc[position],
+                'Column': col,
+                'Value': raw[col].iloc[position],
+                'Problem': issue,
+            })
+
+    for col, dtype in RUN_SCHEMA.items():
+        values = pd.to_numeric(raw[col], errors='coerce')
+        missing = raw[col].isna().to_numpy()
+        not_numeric = values.isna().to_numpy() & ~missing
+        if np.issubdtype(dtype, np.integer):
+            limits = np.iinfo(dtype)
+            not_whole = ~not_numeric & ~missing & (values % 1 != 0).to_numpy()
+        else:
+            limits = np.finfo(dtype)
+            not_whole = np.zeros(len(raw), dtype=bool)
+        present = ~(missing | not_numeric | not_whole)
+        negative = present & (values < 0).to_numpy()
+        too_large = present & (values > limits.max).to_numpy()
+        report(missing, col, 'missing')
+        report(not_numeric, col, 'not a number')
+        report(not_whole, col, 'not a whole number')
+        report(negative, col, 'negative')
+        report(too_large, col, 'too large')
+        drop |= ~present | negative | too_large
+        columns[col] = values
+
+    for col in raw.columns:
+        if col.startswith(ACHIEVEMENT_PREFIX):
+            values = raw[col]
+            report(values.notna().to_numpy() & ~values.isin([True, False]).to_numpy(), col, 'not true/false, read as not reached')
+
+    for col in CATEGORY_COLUMNS:
+        if col in raw.columns:
+            values = raw[col]
+            if pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty'):
+                continue
+            is_text = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+            not_text = values.notna().to_numpy() & ~is_text
+            report(not_text, col, 'not text, read as text')
+            columns[col] = values.astype(object).where(~not_text, values[not_text].map(_as_text))
+
+    runs = raw.assign(**columns)[~drop]
+    runs = runs.astype({col: dtype for col, dtype in RUN_SCHEMA.items()})
+    problems.sort(key=lambda problem: problem['Row'])
+    return runs.reset_index(drop=True), problems
+
+
+def _categorize(data):
+    """Player and cause as categoricals (with sorted categories, so sorting
+    them still sorts by name); other missing text as NaN, like read_excel"""
+    objects = data.columns[data.dtypes == object]
+    data[objects] = data[objects].where(data[objects].notna(), np.nan)
+    for col in CATEGORY_COLUMNS:
+        if col in data.columns:
+            values = data[col].astype('category')
+            data[col] = values.cat.reorder_categories(sorted(values.cat.categories))
+    return data
+
+
+def typed_runs(raw):
+    """Validated, packed and compactly typed runs table from a parsed sheet"""
+    runs, _ = validate_runs(raw)
+    return _categorize(pack_achievements(runs))
+
+
+def achievement_names(data):
+    """Ordered achievement registry of a packed runs table"""
+    return data.attrs['achievements']
+
+
+def achievement_flags(data):
+    """Unpack the bitmask into one bool column per achievement, named without the prefix"""
+    names = achievement_names(data)
+    masks = data[ACHIEVEMENT_MASK].to_numpy()
+    flags = (masks[:, None] >> np.arange(len(names), dtype=masks.dtype)) & 1
+    return pd.DataFrame(flags.astype(bool), columns=names, index=data.index)
+
+
+def read_ods(path, sheet=None):
+    """Parse one sheet (the first by default) of the spreadsheet into memory (slow path)"""
+    return typed_runs(read_sheet(path, sheet))
+
+
+def _cache_paths(abspath, cache_dir, sheet=None):
+    key_source = abspath if sheet is None else f'{abspath}\0{sheet}'
+    key = hashlib.sha1(key_source.encode('utf-8')).hexdigest()[:16]
+    base = os.path.join(cache_dir, f"{os.path.basename(abspath)}-{key}")
+    return base + '.arrow', base + '.json'
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != CACHE_VERSION:
+        return None
+    return manifest
+
+
+def write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_manifest(manifest_path, manifest):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, default=str)
+    write_atomic(manifest_path, write)
+
+
+def _read_cache(data_path):
+    # Uncompressed IPC files can be memory-mapped instead of read into memory;
+    # categorical columns are decoded straight from Arrow dictionaries, so no
+    # Python string is created per row
+    table = feather.read_table(data_path, memory_map=True)
+    categories = [col for col in CATEGORY_COLUMNS if col in table.column_names]
+    return _categorize(table.to_pandas(categories=categories))
+
+
+def _arrow_safe(data):
+    """`data` with free-text columns Arrow can't type (numbers and text mixed,
+    say in a Notes column) turned into text"""
+    for col in data.columns[data.dtypes == object]:
+        try:
+            pa.array(data[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            data[col] = data[col].map(_as_text, na_action='ignore')
+    return data
+
+
+def _write_cache(data, data_path):
+    write_atomic(data_path, lambda tmp_path: feather.write_feather(data, tmp_path, compression='uncompressed'))
+
+
+class _SchemaWidened(Exception):
+    """A later batch needs wider column types than the cache file was started with"""
+
+    def __init__(self, schema):
+        super().__init__(schema)
+        self.schema = schema
+
+
+def _write_batches(path, sheet, tmp_path, schema, problems):
+    writer = None
+    offset = 0
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        for batch in iter_batches(path, sheet):
+            runs, batch_problems = validate_runs(batch, offset)
+            offset += len(batch)
+            problems.extend(batch_problems)
+            table = pa.Table.from_pandas(_arrow_safe(pack_achievements(runs)), preserve_index=False)
+            if schema is None:
+                schema = table.schema
+            elif not table.schema.equals(schema):
+                # e.g. an int column that only has gaps further down
+                widened = pa.unify_schemas([schema, table.schema], promote_options='permissive')
+                if not widened.equals(schema):
+                    raise _SchemaWidened(widened)
+                table = table.cast(schema)
+            if writer is None:
+                writer = pa.ipc.new_file(sink, schema)
+            writer.write_table(table)
+        writer.close()
+
+
+def _stream_cache(path, sheet, data_path):
+    """Parse and validate the sheet batch by batch straight into the Arrow
+    cache file; returns the problems found"""
+    schema = None
+    while True:
+        problems = []
+        try:
+            write_atomic(data_path, lambda tmp_path: _write_batches(path, sheet, tmp_path, schema, problems))
+            return problems
+        except _SchemaWidened as widened:
+            # Start over with the wider types; a column can only widen a couple of times
+            schema = widened.schema
+
+
+def load_runs(path='stats.ods', cache_dir=CACHE_DIR, sheet=None):
+    """Load the runs table from one sheet (the first by default), re-parsing
+    the ODS only when its contents changed"""
+    abspath, size, mtime_ns = file_fingerprint(path)
+    data_path, manifest_path = _cache_paths(abspath, cache_dir, sheet)
+    manifest = _read_manifest(manifest_path)
+    have_cache = manifest is not None and os.path.exists(data_path)
+
+    # Fast path: file untouched since the cache was written
+    if have_cache and manifest['size'] == size and manifest['mtime_ns'] == mtime_ns:
+        return _read_cache(data_path)
+
+    # File was touched; only re-parse if the bytes actually differ
+    sha256 = content_hash(path)
+    new_manifest = {
+        'version': CACHE_VERSION,
+        'path': abspath,
+        'sheet': sheet,
+        'size': size,
+        'mtime_ns': mtime_ns,
+        'sha256': sha256,
+    }
+    if have_cache and manifest['sha256'] == sha256:
+        problems = manifest['problems']
+        problem_count = manifest['problem_count']
+    else:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            problems = _stream_cache(path, sheet, data_path)
+        except OSError:
+            # Read-only deployments still work, just without the cache
+            return read_ods(path, sheet)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Column types that can't be reconciled across batches (say,
+            # numbers above and text below): parse in one go instead, where
+            # such a column is read as text
+            runs, problems = validate_runs(read_sheet(path, sheet))
+            _write_cache(_arrow_safe(_categorize(pack_achievements(runs))), data_path)
+        problem_count = len(problems)
+    new_manifest['problem_count'] = problem_count
+    new_manifest['problems'] = problems[:MAX_REPORTED_PROBLEMS]
+    data = _read_cache(data_path)
+
+    try:
+        _write_manifest(manifest_path, new_manifest)
+    except OSError:
+        pass
+    return data
+
+
+def sheet_problems(path='stats.ods', cache_dir=CACHE_DIR, sheet=None):
+    """`(count, DataFrame)` of the rows load_runs found problems with when it
+    last parsed the sheet; the frame lists at most MAX_REPORTED_PROBLEMS"""
+    abspath = os.path.abspath(path)
+    manifest = _read_manifest(_cache_paths(abspath, cache_dir, sheet)[1])
+    if manifest is None:
+        return 0, pd.DataFrame(columns=['Row', 'Run', 'Column', 'Value', 'Problem'])
+    return manifest['problem_count'], pd.DataFrame(manifest['problems'], columns=['Row', 'Run', 'Column', 'Value', 'Problem'])
+
+
+def appended_rows(previous, current):
+    """Rows of `current` added after the runs in `previous`.
+
+    Returns None when `current` is not `previous` plus new trailing runs (a
+    column was added, an earlier row was edited or removed, Run numbers do
+    not keep increasing, or a new player or cause changed the categories),
+    in which case everything has to be rebuilt.
+    """
+    count = len(previous)
+    if len(current) < count or list(current.columns) != list(previous.columns):
+        return None
+    if achievement_names(current) != achievement_names(previous):
+        return None
+    new_rows = current.iloc[count:]
+    if not new_rows['Run'].is_monotonic_increasing or new_rows['Run'].duplicated().any():
+        return None
+    if count and len(new_rows) and new_rows['Run'].iloc[0] <= previous['Run'].iloc[-1]:
+        return None
+    if not current.iloc[:count].reset_index(drop=True).equals(previous.reset_index(drop=True)):
+        return None
+    return new_rows
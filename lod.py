@@ -0,0 +1,53 @@
+"""Level of detail for charts over large histories.
+
+Each chart has a budget for how much it sends to the browser. Past the
+budget, runs are merged into chunks or "other" buckets, consecutive days are
+binned into one bar or point, and step curves are sampled on a fixed grid of
+durations. The budgets below are the knobs; a drill-down view of one day or
+one player gets a larger budget of its own.
+"""
+import numpy as np
+
+# Above this many runs the per-run stacked charts switch to an aggregated view
+MAX_DETAILED_RUNS = 500
+# Segments kept per bar once the aggregated view kicks in
+AGGREGATED_SEGMENTS = 30
+# Segments per bar when drilling into one day or player; below this every
+# run is drawn on its own
+MAX_DRILLDOWN_SEGMENTS = 2000
+# Bars in the all-days timeline; more days than this are binned into ranges
+MAX_TIMELINE_BARS = 60
+# Player bars in the time lost chart; the rest become one "Other players" bar
+MAX_PLAYER_BARS = 20
+# Points per series in the per-day trend charts
+MAX_TREND_POINTS = 500
+# Points per step curve (survival, hazards)
+MAX_CURVE_POINTS = 500
+
+
+def bin_size(count, budget):
+    """Items per bin so that `count` items (a number or an array of them) fit
+    in `budget` bins"""
+    return np.maximum(1, -(-np.asarray(count) // budget))
+
+
+def range_label(first, last, singular, plural):
+    """'Day 3' for a single item, 'Days 3–9' for a range"""
+    if first == last:
+        return f"{singular} {first}"
+    return f"{plural} {first}–{last}"
+
+
+def sample_steps(x, max_points=MAX_CURVE_POINTS):
+    """Row positions that keep a step curve (sorted `x`) within `max_points`.
+
+    The curve is read at evenly spaced durations: each kept row is the last
+    one at or before a grid point, so the sampled steps never run ahead of
+    the real curve. The first and last rows are always kept.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) <= max_points:
+        return np.arange(len(x))
+    grid = np.linspace(x[0], x[-1], max_points)
+    rows = np.searchsorted(x, grid, side='right') - 1
+    return np.unique(np.concatenate([[0], rows, [len(x) - 1]]))
@@ -0,0 +1,49 @@
+"""Thread-safe LRU cache bounded by the total size of its values.
+
+Shared by the figure cache and the query API's response cache: values are
+built outside the lock, so one slow build doesn't block other readers, and
+the least recently used entries are evicted once the sizes add up to more
+than the byte budget (the newest entry is always kept).
+"""
+import threading
+from collections import OrderedDict
+
+
+class SizedLRU:
+    """LRU of values with a size in bytes, capped at `max_bytes` in total"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build, size=len):
+        """Cached value for `key`, or `build()`'s result, stored with a size of
+        `size(value)`. Two threads missing the same key may both build it;
+        the first one stored wins."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = build()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            value_size = size(value)
+            self._entries[key] = (value, value_size)
+            self.size += value_size
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+        return value
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,162 @@
+"""Achievement timing model.
+
+For every day filter (each day, and all days together) this computes, per
+achievement, the duration statistics of the runs that reached it: mean,
+median, quartiles and a bootstrap confidence interval for the mean, plus the
+straight-line fit of mean duration against milestone order. Everything is
+built in one pass over the runs from a long (run, achievement) table, and the
+result is a small table the milestone chart only reads.
+
+StatsIndex builds it lazily, once per data version.
+"""
+import numpy as np
+import pandas as pd
+
+from loader import ACHIEVEMENT_MASK, DURATION
+
+QUANTILES = {'Q25': 0.25, 'Median': 0.5, 'Q75': 0.75}
+CONFIDENCE = 0.95
+BOOTSTRAP_RESAMPLES = 1000
+# Above this many runs the bootstrap distribution of the mean is
+# indistinguishable from the normal approximation, which is used instead
+BOOTSTRAP_MAX_ROWS = 2000
+# Values resampled together per batch; each batch holds BOOTSTRAP_RESAMPLES
+# times as many draws
+BOOTSTRAP_BATCH_ROWS = 2000
+# Fixed seed so the intervals don't move between reruns of the same data
+BOOTSTRAP_SEED = 0
+ALL_DAYS = 'All Days'
+
+
+def _reached(runs, achievements):
+    """Long table with one row per (run, achievement reached): Day, Achievement
+    (position in milestone order) and Duration"""
+    masks = runs[ACHIEVEMENT_MASK].to_numpy()
+    bits = (masks[:, None] >> np.arange(len(achievements))) & 1
+    rows, positions = np.nonzero(bits)
+    return pd.DataFrame({
+        'Day': runs['Day'].to_numpy()[rows],
+        'Achievement': positions,
+        'Duration': runs[DURATION].to_numpy()[rows].astype(np.float64),
+    })
+
+
+def _bootstrap_intervals(durations, groups, rng):
+    """(low, high) confidence interval for the mean of every group.
+
+    `durations` are sorted by `groups`, the group number of each value. Small
+    groups are resampled together, a batch of groups at a time, so the
+    number of Python-level steps doesn't grow with the number of groups.
+    """
+    counts = np.bincount(groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    tail = (1 - CONFIDENCE) / 2
+
+    # Normal approximation for the large groups
+    means = np.add.reduceat(durations, starts) / counts
+    squares = np.add.reduceat((durations - np.repeat(means, counts)) ** 2, starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        half_width = 1.959963984540054 * np.sqrt(squares / (counts - 1) / counts)
+    low, high = means - half_width, means + half_width
+
+    # Percentile bootstrap for the rest, batches of consecutive groups
+    small = np.flatnonzero(counts <= BOOTSTRAP_MAX_ROWS)
+    batch_numbers = (np.cumsum(counts[small]) - 1) // BOOTSTRAP_BATCH_ROWS
+    for batch in np.split(small, np.flatnonzero(np.diff(batch_numbers)) + 1):
+        if len(batch) == 0:
+            continue
+        sizes = counts[batch]
+        offsets = np.repeat(starts[batch], sizes)
+        draws = offsets + (rng.random((BOOTSTRAP_RESAMPLES, sizes.sum())) * np.repeat(sizes, sizes)).astype(np.int64)
+        positions = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        resampled = np.add.reduceat(durations[draws], positions, axis=1) / sizes
+        low[batch], high[batch] = np.quantile(resampled, [tail, 1 - tail], axis=0)
+    return low, high
+
+
+def _describe(long, keys):
+    """Count, mean, quartiles and mean confidence interval per group of `keys`"""
+    if long.empty:
+        # Nothing reached yet (a new sheet, or a filter that leaves no achievements)
+        index = pd.MultiIndex.from_arrays([long[key] for key in keys]) if len(keys) > 1 else pd.Index(long[keys[0]])
+        columns = ['Count', 'Mean', *QUANTILES, 'CI Low', 'CI High']
+        return pd.DataFrame(index=index, columns=columns, dtype=np.float64)
+    grouped = long.groupby(keys)['Duration']
+    table = grouped.agg(Count='size', Mean='mean')
+    quantiles = grouped.quantile(list(QUANTILES.values())).unstack()
+    quantiles.columns = list(QUANTILES)
+    table = table.join(quantiles)
+
+    groups = grouped.ngroup().to_numpy()
+    order = np.argsort(groups, kind='stable')
+    rng = np.random.default_rng(BOOTSTRAP_SEED)
+    table['CI Low'], table['CI High'] = _bootstrap_intervals(long['Duration'].to_numpy()[order], groups[order], rng)
+    return table
+
+
+def _fit_lines(table):
+    """Least squares line through the mean durations of each day filter's
+    reached achievements, against their position among them.
+
+    All day filters are fitted at once. R² is defined as in scikit-learn's
+    LinearRegression.score; filters with fewer than 2 points get NaN.
+    """
+    days = table.index.get_level_values(0)
+    x = pd.Series(table.groupby(level=0, sort=False).cumcount().to_numpy(np.float64), index=days)
+    y = pd.Series(table['Mean'].to_numpy(), index=days)
+    by_day = lambda values: values.groupby(level=0, sort=False)
+
+    x_centered = x - by_day(x).transform('mean')
+    y_centered = y - by_day(y).transform('mean')
+    slope = by_day(x_centered * y_centered).sum() / by_day(x_centered ** 2).sum()
+    intercept = by_day(y).mean() - slope * by_day(x).mean()
+
+    ss_res = by_day((y - (intercept.reindex(days).to_numpy() + slope.reindex(days).to_numpy() * x)) ** 2).sum()
+    ss_tot = by_day(y_centered ** 2).sum()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r2 = (1 - ss_res / ss_tot).where(ss_tot != 0, (ss_res == 0).astype(np.float64))
+
+    fits = pd.DataFrame({'Slope': slope, 'Intercept': intercept, 'R2': r2})
+    fits.index.name = 'Day'
+    return fits.where(by_day(y).size() >= 2)
+
+
+class AchievementTiming:
+    """Per-achievement duration statistics and milestone fits for every day filter.
+
+    `table` is indexed by (day, achievement) with ALL_DAYS standing for all
+    days; `fits` has one row per day filter with the line's Slope, Intercept
+    and R2, or NaN when fewer than 2 achievements were reached.
+    """
+
+    def __init__(self, runs, achievements):
+        self.achievements = achievements
+        long = _reached(runs, achievements)
+        by_day = _describe(long, ['Day', 'Achievement'])
+        overall = pd.concat({ALL_DAYS: _describe(long, ['Achievement'])}, names=['Day'])
+
+        names = np.array(achievements, dtype=object)
+        table = pd.concat([overall, by_day])
+        table.index = pd.MultiIndex.from_arrays(
+            [table.index.get_level_values(0), names[table.index.get_level_values(1).to_numpy(dtype=np.int64)]],
+            names=['Day', 'Achievement'],
+        )
+        self.table = table
+        self.fits = _fit_lines(table)
+
+    def _key(self, day):
+        return ALL_DAYS if day is None else day
+
+    def achievements_for(self, day=None):
+        """Statistics of the achievements reached under a day filter, in milestone order"""
+        key = self._key(day)
+        if key not in self.fits.index:
+            return self.table.iloc[0:0].droplevel(0)
+        return self.table.xs(key, level=0)
+
+    def fit(self, day=None):
+        """(slope, intercept, r2) of the milestone fit for a day filter, or None"""
+        key = self._key(day)
+        if key not in self.fits.index or self.fits.loc[key].isna().any():
+            return None
+        return tuple(self.fits.loc[key])
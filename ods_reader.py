@@ -0,0 +1,183 @@
+"""Streaming reader for OpenDocument spreadsheets.
+
+pd.read_excel(engine='odf') builds odfpy's DOM of the whole content.xml before
+returning a single row. This reader walks content.xml straight out of the zip
+with an incremental XML parser instead, converts each row as soon as its end
+tag is seen and drops it again, and hands rows out as DataFrames of a fixed
+batch size. Memory use depends on the batch size, not on the sheet size.
+
+Cells are typed the way pandas' odf reader types them: whole numbers become
+ints, booleans bools, text str and empty cells (or empty text) NaN. Repeated
+cells and rows (table:number-columns-repeated / table:number-rows-repeated)
+are expanded, except for the runs of empty cells and rows that spreadsheet
+apps pad sheets with, which are skipped like read_excel skips blank lines.
+"""
+import zipfile
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+
+TABLE_NS = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+OFFICE_NS = 'urn:oasis:names:tc:opendocument:xmlns:office:1.0'
+TEXT_NS = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+
+TABLE = f'{{{TABLE_NS}}}table'
+TABLE_NAME = f'{{{TABLE_NS}}}name'
+ROW = f'{{{TABLE_NS}}}table-row'
+CELL = f'{{{TABLE_NS}}}table-cell'
+COVERED_CELL = f'{{{TABLE_NS}}}covered-table-cell'
+ROWS_REPEATED = f'{{{TABLE_NS}}}number-rows-repeated'
+COLUMNS_REPEATED = f'{{{TABLE_NS}}}number-columns-repeated'
+VALUE_TYPE = f'{{{OFFICE_NS}}}value-type'
+PARAGRAPH = f'{{{TEXT_NS}}}p'
+SPACES = f'{{{TEXT_NS}}}s'
+SPACE_COUNT = f'{{{TEXT_NS}}}c'
+TAB = f'{{{TEXT_NS}}}tab'
+LINE_BREAK = f'{{{TEXT_NS}}}line-break'
+
+BATCH_SIZE = 10000
+
+
+def sheet_names(path):
+    """Names of the sheets in an .ods workbook, in order"""
+    return [name for name, _ in _tables(path)]
+
+
+def _tables(path):
+    """Yield (sheet name, row iterator) for each sheet of the workbook.
+
+    The row iterator yields each table:table-row element once its end tag has
+    been parsed; the element is cleared and detached as soon as the consumer
+    moves on, so only one row is ever held in memory. Rows not consumed are
+    skipped.
+    """
+    with zipfile.ZipFile(path) as archive, archive.open('content.xml') as content:
+        events = ElementTree.iterparse(content, events=('start', 'end'))
+        parents = []
+        for event, element in events:
+            if event == 'start':
+                parents.append(element)
+                if element.tag == TABLE:
+                    yield element.get(TABLE_NAME), _rows(events, parents)
+            else:
+                parents.pop()
+                # Rows of sheets nobody asked for are dropped straight away
+                if element.tag == ROW:
+                    element.clear()
+                    parents[-1].remove(element)
+                elif element.tag == TABLE:
+                    element.clear()
+
+
+def _rows(events, parents):
+    depth = len(parents)
+    for event, element in events:
+        if event == 'start':
+            parents.append(element)
+            continue
+        parents.pop()
+        if element.tag == ROW:
+            yield element
+            element.clear()
+            parents[-1].remove(element)
+        elif len(parents) < depth:
+            # End of the table itself
+            element.clear()
+            return
+
+
+def _text(element):
+    parts = [element.text or '']
+    for child in element:
+        if child.tag == SPACES:
+            parts.append(' ' * int(child.get(SPACE_COUNT, 1)))
+        elif child.tag == TAB:
+            parts.append('\t')
+        elif child.tag == LINE_BREAK:
+            parts.append('\n')
+        else:
+            parts.append(_text(child))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+
+def _cell_value(cell):
+    """Typed value of a cell, or None when it is empty"""
+    value_type = cell.get(VALUE_TYPE)
+    if value_type in ('float', 'percentage', 'currency'):
+        value = float(cell.get(f'{{{OFFICE_NS}}}value'))
+        return int(value) if value.is_integer() else value
+    if value_type == 'boolean':
+        return cell.get(f'{{{OFFICE_NS}}}boolean-value') == 'true'
+    if value_type == 'date':
+        return pd.Timestamp(cell.get(f'{{{OFFICE_NS}}}date-value'))
+    if value_type == 'time':
+        return pd.Timedelta(cell.get(f'{{{OFFICE_NS}}}time-value'))
+    if value_type == 'string':
+        # Direct paragraphs only; annotations nest their own text:p elements
+        text = '\n'.join(_text(p) for p in cell if p.tag == PARAGRAPH)
+        return text or None
+    return None
+
+
+def _row_values(row):
+    """Cell values of a row, with trailing empty cells dropped"""
+    values = []
+    pending_empty = 0
+    for cell in row:
+        if cell.tag not in (CELL, COVERED_CELL):
+            continue
+        repeat = int(cell.get(COLUMNS_REPEATED, 1))
+        value = _cell_value(cell) if cell.tag == CELL else None
+        if value is None:
+            # Only materialized if a non-empty cell follows
+            pending_empty += repeat
+            continue
+        values.extend([None] * pending_empty)
+        pending_empty = 0
+        values.extend([value] * repeat)
+    return values
+
+
+def _frame(rows, columns):
+    frame = pd.DataFrame(rows, columns=columns)
+    # Missing strings and flags come through as None; read_excel gives NaN
+    objects = frame.columns[frame.dtypes == object]
+    frame[objects] = frame[objects].where(frame[objects].notna(), np.nan)
+    return frame
+
+
+def iter_batches(path, sheet=None, batch_size=BATCH_SIZE):
+    """Yield one sheet (the first by default, else by name or position) as
+    DataFrames of up to `batch_size` rows, using its first row as the header"""
+    for position, (name, rows) in enumerate(_tables(path)):
+        if sheet is not None and sheet not in (name, position):
+            continue
+
+        columns = None
+        batch = []
+        yielded = False
+        for row in rows:
+            values = _row_values(row)
+            if not values:
+                continue
+            if columns is None:
+                columns = [str(value) if value is not None else f'Unnamed: {idx}' for idx, value in enumerate(values)]
+                continue
+            values = (values + [None] * len(columns))[:len(columns)]
+            for _ in range(int(row.get(ROWS_REPEATED, 1))):
+                batch.append(values)
+                if len(batch) >= batch_size:
+                    yield _frame(batch, columns)
+                    yielded = True
+                    batch = []
+        if batch or not yielded:
+            yield _frame(batch, columns or [])
+        return
+    raise ValueError(f"Worksheet {sheet!r} not found in {path}")
+
+
+def read_sheet(path, sheet=None):
+    """Whole sheet as one DataFrame"""
+    return pd.concat(list(iter_batches(path, sheet)), ignore_index=True)
@@ -0,0 +1,164 @@
+"""Per-section timing for a dashboard rerun.
+
+Each section of the page calls `start()` when it begins; the previous section
+is closed at that point, so the page code doesn't need extra indentation. The
+records can be shown in the debug panel or exported as JSON/CSV.
+
+Running the module measures what each of the app's imports costs in a fresh
+interpreter, which is most of the dashboard's cold start:
+
+    python profiling.py
+"""
+import csv
+import io
+import json
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Third-party modules the dashboard imports at startup, then its own modules
+STARTUP_MODULES = [
+    'numpy', 'pandas', 'pyarrow.feather', 'plotly.graph_objects', 'streamlit',
+    'loader', 'aggregates', 'charts', 'dataset', 'figure_cache',
+]
+
+# Sessions that asked for memory tracing; tracemalloc is process-wide, so it
+# runs while any of them still wants it
+_memory_sessions = set()
+_memory_lock = threading.Lock()
+_started_tracing = False
+
+
+def _trace_memory(session, wanted):
+    """Register whether `session` wants tracemalloc running; starts it for the
+    first session that asks and stops it (if started here) once none does"""
+    global _started_tracing
+    with _memory_lock:
+        if wanted:
+            _memory_sessions.add(session)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracing = True
+        elif session in _memory_sessions:
+            _memory_sessions.discard(session)
+            if not _memory_sessions and _started_tracing and tracemalloc.is_tracing():
+                tracemalloc.stop()
+                _started_tracing = False
+
+
+class SectionProfiler:
+    """Wall time, rows processed, trace count and figure size per page section.
+
+    With `trace_memory` the peak traced allocation of each section is recorded
+    as well. tracemalloc is process-wide, so with several sessions rendering at
+    once those numbers are approximate; it keeps running while any `session`
+    still has memory tracing turned on.
+    """
+
+    def __init__(self, trace_memory=False, data_version=None, session=None):
+        self.trace_memory = trace_memory
+        self.data_version = data_version
+        self.records = []
+        self._current = None
+        self._started = None
+        self._memory_before = 0
+        _trace_memory(session, trace_memory)
+
+    def start(self, section, rows=None):
+        """Begin timing `section`, closing the one before it"""
+        self.finish()
+        self._current = {
+            'section': section,
+            'rows': rows,
+            'traces': 0,
+            'figure_bytes': 0,
+        }
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._memory_before = tracemalloc.get_traced_memory()[0]
+        self._started = time.perf_counter()
+
+    def record(self, section, seconds, rows=None):
+        """Add a section that was timed elsewhere, e.g. the imports before the profiler existed"""
+        self.finish()
+        self.records.append({
+            'section': section,
+            'rows': rows,
+            'traces': 0,
+            'figure_bytes': 0,
+            'seconds': seconds,
+        })
+
+    def add_figure(self, figure, size):
+        """Count a figure (as a Plotly dict) and its serialized size against the current section"""
+        if self._current is None:
+            return
+        self._current['traces'] += len(figure.get('data', []))
+        self._current['figure_bytes'] += size
+
+    def finish(self):
+        """Close the current section, if any"""
+        if self._current is None:
+            return
+        self._current['seconds'] = time.perf_counter() - self._started
+        if self.trace_memory and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            self._current['peak_kb'] = max(0, peak - self._memory_before) / 1024
+        self.records.append(self._current)
+        self._current = None
+
+    def to_frame(self):
+        self.finish()
+        frame = pd.DataFrame(self.records)
+        frame.insert(0, 'data_version', self.data_version)
+        frame.insert(0, 'timestamp', time.strftime('%Y-%m-%dT%H:%M:%S'))
+        return frame
+
+    def to_json(self):
+        return json.dumps(self.to_frame().to_dict(orient='records'), indent=2, default=str)
+
+    def to_csv(self):
+        buffer = io.StringIO()
+        self.to_frame().to_csv(buffer, index=False, quoting=csv.QUOTE_MINIMAL)
+        return buffer.getvalue()
+
+
+def _top_level_imports(code):
+    """{module: cumulative microseconds} for the top-level imports made while running `code`"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True,
+    )
+    imports = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"; nested
+        # imports are indented under the package that pulled them in
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit() and not name.startswith('  '):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def import_time(module):
+    """Seconds to import `module` in a fresh interpreter, including its dependencies.
+
+    Modules the interpreter loads at startup anyway are not counted.
+    """
+    startup = _top_level_imports('pass')
+    imports = _top_level_imports(f'import {module}')
+    return sum(us for name, us in imports.items() if name not in startup) / 1e6
+
+
+def main():
+    for module in STARTUP_MODULES:
+        print(f"{module:<22} {import_time(module) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
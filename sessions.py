@@ -0,0 +1,57 @@
+"""Process-wide accounting of the memory each viewer's rerun materializes.
+
+Every session renders from the same shared StatsIndex and figure cache, and
+day filters are views into the shared runs table. What a session still
+allocates for itself is the figures it parses and the table page it sends to
+the browser. Those are charged here while its rerun is in progress and
+released when the rerun ends. A session over its own cap, or arriving while
+all sessions together are over the total cap, gets those elements skipped
+instead of pushing the process out of memory during a spike of viewers.
+"""
+import threading
+
+
+class SessionBudget:
+    """Bytes charged per session for the rerun in progress, with per-session and total caps"""
+
+    def __init__(self, per_session_bytes=128 * 1024 * 1024, total_bytes=512 * 1024 * 1024):
+        self.per_session_bytes = per_session_bytes
+        self.total_bytes = total_bytes
+        self.total = 0
+        self.refused = 0
+        self._usage = {}
+        self._lock = threading.Lock()
+
+    def begin(self, session_id):
+        """Start a rerun for `session_id`, dropping anything left from its last one"""
+        self.end(session_id)
+        with self._lock:
+            self._usage[session_id] = 0
+
+    def charge(self, session_id, nbytes):
+        """Account `nbytes` to the session; False (and nothing charged) if that would break a cap"""
+        with self._lock:
+            used = self._usage.get(session_id, 0)
+            if used + nbytes > self.per_session_bytes or self.total + nbytes > self.total_bytes:
+                self.refused += 1
+                return False
+            self._usage[session_id] = used + nbytes
+            self.total += nbytes
+            return True
+
+    def used(self, session_id):
+        with self._lock:
+            return self._usage.get(session_id, 0)
+
+    def end(self, session_id):
+        """Release everything charged to the session's rerun"""
+        with self._lock:
+            self.total -= self._usage.pop(session_id, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'sessions': len(self._usage),
+                'total_bytes': self.total,
+                'refused': self.refused,
+            }
@@ -0,0 +1,87 @@
+"""Survival analysis over run durations.
+
+A run "survives" until a player dies; runs without a recorded death (one
+still in progress, or stopped for the day) are censored at their duration.
+Everything here works on exit counts per distinct duration rather than on
+individual runs: StatsIndex keeps those counts as additive tables that are
+merged when runs are appended, and the curves below are a few vectorised
+passes over the distinct durations.
+
+- Kaplan–Meier: S(t) = prod over durations t_i <= t of (1 - d_i / n_i), where
+  n_i runs were still going at t_i and d_i of them ended in a death then,
+  with a 95% confidence band from Greenwood's variance on the log(-log) scale.
+- Cause-specific (or player-specific) curves count only deaths of that cause
+  as events; other deaths are treated as censoring at that time.
+- Nelson–Aalen cumulative hazard per cause: H_c(t) = sum of d_c,i / n_i.
+"""
+import numpy as np
+import pandas as pd
+
+Z_95 = 1.959963984540054
+
+
+def exit_counts(durations, died):
+    """Exits (all runs) and Deaths per distinct duration, sorted by duration"""
+    frame = pd.DataFrame({'Exits': 1, 'Deaths': np.asarray(died, dtype=np.int64)},
+                         index=pd.Index(np.asarray(durations, dtype=np.float64), name='Duration'))
+    return frame.groupby(level=0).sum()
+
+
+def _at_risk(exits):
+    """Runs still going just before each duration"""
+    exits = exits.to_numpy(dtype=np.float64)
+    return exits.sum() - (np.cumsum(exits) - exits)
+
+
+def kaplan_meier(exits, deaths):
+    """Kaplan–Meier curve from exit and death counts indexed by duration.
+
+    Returns one row per distinct duration with At Risk, Deaths, Survival (just
+    after that duration) and the Lower/Upper 95% band.
+    """
+    deaths = deaths.reindex(exits.index, fill_value=0).to_numpy(dtype=np.float64)
+    at_risk = _at_risk(exits)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        survival = np.cumprod(1 - deaths / at_risk)
+        # Greenwood, on log(-log S) so the band stays within [0, 1]
+        greenwood = np.cumsum(deaths / (at_risk * (at_risk - deaths)))
+        spread = Z_95 * np.sqrt(greenwood) / np.abs(np.log(survival))
+        lower = survival ** np.exp(spread)
+        upper = survival ** np.exp(-spread)
+    # No band before the first death, nor once nobody is left
+    lower = np.where(greenwood > 0, lower, survival)
+    upper = np.where(greenwood > 0, upper, survival)
+    lower = np.where(survival > 0, lower, 0.0)
+    upper = np.where(survival > 0, upper, 0.0)
+    return pd.DataFrame({
+        'Duration': exits.index.to_numpy(dtype=np.float64),
+        'At Risk': at_risk.astype(np.int64),
+        'Deaths': deaths.astype(np.int64),
+        'Survival': survival,
+        'Lower': lower,
+        'Upper': upper,
+    })
+
+
+def survival_at(curve, minutes):
+    """Probability of surviving past `minutes` (scalar or array) on a KM curve.
+
+    Beyond the longest run observed the last value is carried forward.
+    """
+    positions = np.searchsorted(curve['Duration'].to_numpy(), minutes, side='right')
+    values = np.concatenate([[1.0], curve['Survival'].to_numpy()])
+    return values[positions]
+
+
+def cumulative_hazards(exits, deaths_by_cause):
+    """Nelson–Aalen cumulative hazard per cause.
+
+    `deaths_by_cause` is indexed by (cause, duration); the result has one row
+    per distinct duration and one column per cause.
+    """
+    deaths = deaths_by_cause.unstack(level=0, fill_value=0).reindex(exits.index, fill_value=0)
+    at_risk = _at_risk(exits)
+    return pd.DataFrame(
+        np.cumsum(deaths.to_numpy(dtype=np.float64) / at_risk[:, None], axis=0),
+        index=exits.index, columns=deaths.columns,
+    )
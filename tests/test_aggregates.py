@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import _MERGE_RULES, StatsIndex
+from benchmark import generate_runs
+from loader import typed_runs
+
+
+@pytest.fixture(scope='module')
+def runs():
+    return typed_runs(generate_runs(2000, runs_per_day=70))
+
+
+def assert_same_index(appended, rebuilt):
+    for name in _MERGE_RULES:
+        table, expected = getattr(appended, name), getattr(rebuilt, name)
+        if isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(table, expected, obj=name)
+        else:
+            pd.testing.assert_frame_equal(table, expected, obj=name)
+    assert appended.days == rebuilt.days
+    for day in rebuilt.days:
+        np.testing.assert_array_equal(appended.day_runs(day).index, rebuilt.day_runs(day).index)
+    for day in (None, *rebuilt.days[-2:]):
+        assert appended.summary(day) == rebuilt.summary(day)
+        pd.testing.assert_frame_equal(appended.survival(day), rebuilt.survival(day))
+        pd.testing.assert_frame_equal(appended.survival(day, 'Neuro'), rebuilt.survival(day, 'Neuro'))
+        pd.testing.assert_frame_equal(appended.cause_hazards(day), rebuilt.cause_hazards(day))
+    pd.testing.assert_frame_equal(appended.trends(), rebuilt.trends())
+
+
+@pytest.mark.parametrize('split', [35, 1000, 1999])
+def test_appended_matches_a_full_rebuild(runs, split):
+    # Splits fall mid-day, so the first appended day merges with an existing one
+    appended = StatsIndex(runs.iloc[:split]).appended(runs)
+    assert_same_index(appended, StatsIndex(runs))
+
+
+def test_appended_in_several_steps(runs):
+    stats = StatsIndex(runs.iloc[:100])
+    for stop in (101, 450, 451, 1300, len(runs)):
+        stats = stats.appended(runs.iloc[:stop])
+    assert_same_index(stats, StatsIndex(runs))
+
+
+def test_appending_nothing(runs):
+    stats = StatsIndex(runs)
+    assert_same_index(stats.appended(runs), stats)
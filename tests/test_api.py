@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import threading
+import urllib.error
+import urllib.request
+
+import pyarrow as pa
+import pytest
+
+import api
+from dataset import PartitionedDataset
+
+STATS = os.path.join(os.path.dirname(__file__), os.pardir, 'stats.ods')
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(STATS, 'stats.ods')
+    server = api.make_server(PartitionedDataset('*.ods', watch=False), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, headers=None):
+    host, port = server.server_address
+    request = urllib.request.Request(f'http://{host}:{port}{path}', headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+def test_binds_to_localhost_by_default(server):
+    assert server.server_address[0] == '127.0.0.1'
+
+
+def test_summary_and_conditional_requests(server):
+    status, headers, body = get(server, '/api/summary?day=2')
+    assert status == 200
+    payload = json.loads(body)
+    assert payload['day'] == 2 and payload['data']['runs'] > 0
+
+    status, _, body = get(server, '/api/summary?day=2', {'If-None-Match': headers['ETag']})
+    assert (status, body) == (304, b'')
+    assert get(server, '/api/summary?day=3')[1]['ETag'] != headers['ETag']
+
+
+def test_arrow_responses(server):
+    status, headers, body = get(server, '/api/trends?format=arrow')
+    assert status == 200 and headers['Content-Type'] == api.ARROW_TYPE
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.num_rows > 0 and 'Avg Duration' in table.column_names
+
+
+def test_format_from_the_accept_header_varies_the_response(server):
+    status, headers, body = get(server, '/api/trends', {'Accept': api.ARROW_TYPE})
+    assert status == 200 and headers['Content-Type'] == api.ARROW_TYPE
+    assert headers['Vary'] == 'Accept'
+    _, json_headers, _ = get(server, '/api/trends')
+    assert json_headers['Content-Type'] == api.JSON_TYPE and json_headers['ETag'] != headers['ETag']
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/api/nope', 404),
+    ('/api/summary?day=x', 400),
+    ('/api/summary?day=99', 404),
+    ('/api/summary?season=missing', 404),
+])
+def test_bad_requests(server, path, status):
+    assert get(server, path)[0] == status
+
+
+def test_unexpected_errors_become_a_json_500(server, monkeypatch):
+    def fail(stats, params):
+        raise KeyError(4)
+    monkeypatch.setitem(api.QUERIES, 'summary', fail)
+    status, headers, body = get(server, '/api/summary')
+    assert status == 500 and 'error' in json.loads(body)
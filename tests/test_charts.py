@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from aggregates import StatsIndex
+from benchmark import generate_runs
+from charts import build_time_lost, build_timeline
+from loader import DURATION, typed_runs
+
+
+@pytest.fixture(scope='module')
+def stats():
+    return StatsIndex(typed_runs(generate_runs(200, runs_per_day=50)))
+
+
+def segment_values(fig, horizontal):
+    bars = [trace for trace in fig.data if trace.type == 'bar']
+    ends = np.concatenate([trace.x if horizontal else trace.y for trace in bars])
+    hovered = np.concatenate([trace.customdata[:, 2] for trace in bars]).astype(np.float64)
+    assert all('%{customdata[2]} minutes' in trace.hovertemplate for trace in bars)
+    return hovered, ends.astype(np.float64)
+
+
+def test_stacked_hover_shows_each_run_duration(stats):
+    # Segments are drawn from a base, so the hover must not read the stack end
+    fig, _ = build_time_lost(stats, 1)
+    hovered, values = segment_values(fig, horizontal=True)
+    np.testing.assert_array_equal(hovered, values)
+    assert sorted(hovered) == sorted(stats.day_runs(1).dropna(subset=['Player Death'])[DURATION].astype(np.float64))
+
+    fig, _ = build_timeline(stats, 1)
+    hovered, values = segment_values(fig, horizontal=False)
+    np.testing.assert_array_equal(hovered, values)
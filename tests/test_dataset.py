@@ -0,0 +1,68 @@
+import os
+import shutil
+import threading
+
+import pytest
+
+import dataset
+from dataset import LiveDataset, PartitionedDataset
+
+STATS = os.path.join(os.path.dirname(__file__), os.pardir, 'stats.ods')
+
+
+@pytest.fixture
+def season(tmp_path, monkeypatch):
+    # Relative paths, as the app uses them, and a cache inside tmp_path
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(STATS, 'stats.ods')
+    return tmp_path / 'stats.ods'
+
+
+def test_missing_file_keeps_serving_the_published_version(season):
+    dataset = LiveDataset('stats.ods')
+    stats = dataset.current()
+    os.replace(season, season.with_suffix('.bak'))  # mid-save: the file is gone
+
+    assert dataset.current() is stats
+    assert dataset.stale()
+    assert dataset.refresh() is stats
+    assert dataset.error is None
+
+
+def test_missing_file_before_the_first_load_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LiveDataset(str(tmp_path / 'stats.ods')).current()
+
+
+def test_partitions_survive_a_missing_file(season):
+    seasons = PartitionedDataset('*.ods', watch=False)
+    partitions = seasons.partitions()
+    stats = seasons.get(*partitions[0]).current()
+    os.replace(season, season.with_suffix('.bak'))
+
+    assert seasons.partitions() == partitions
+    assert seasons.get(*partitions[0]).current() is stats
+    assert seasons.events(partitions[0][0]) is None
+
+
+def test_changed_sheet_list_is_read_in_the_background(season, monkeypatch):
+    seasons = PartitionedDataset('*.ods', watch=False)
+    partitions = seasons.partitions()
+    listed = threading.Event()
+    release = threading.Event()
+
+    def slow_sheet_names(path):
+        listed.set()
+        release.wait(10)
+        return [sheet for _, sheet in partitions] + ['Extra']
+
+    monkeypatch.setattr(dataset, 'sheet_names', slow_sheet_names)
+    os.utime(season, ns=(0, os.stat(season).st_mtime_ns + 10**9))
+
+    # The viewer that notices the save gets the old list without waiting
+    assert seasons.partitions() == partitions
+    assert listed.wait(10)
+    assert seasons.partitions() == partitions
+    release.set()
+    seasons._listers[str(season.name)].join(10)
+    assert seasons.partitions() == partitions + [('stats', 'Extra')]
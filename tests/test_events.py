@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import StatsIndex
+from benchmark import ACHIEVEMENTS, generate_events, generate_runs
+from charts import build_milestone_times, build_survival
+from events import EventLog, _aggregate, _to_table, validate_events
+from loader import typed_runs
+
+
+@pytest.fixture(scope='module')
+def raw():
+    return generate_runs(600, runs_per_day=150)
+
+
+@pytest.fixture(scope='module')
+def events(raw):
+    return generate_events(raw)
+
+
+def assert_same_tables(index, events):
+    expected = _aggregate(_to_table(validate_events(events)[0]))
+    for name, table in index._tables().items():
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(table).sort_index(), pd.DataFrame(expected[name]).sort_index(), check_dtype=False
+        )
+
+
+def test_appends_and_compaction_match_one_aggregate(tmp_path, events):
+    log = EventLog(str(tmp_path))
+    # Shuffled, so one run's events land in several segments, and more
+    # appends than MAX_SEGMENTS, so the log gets compacted
+    shuffled = events.sample(frac=1, random_state=1).reset_index(drop=True)
+    for start in range(0, len(shuffled), len(shuffled) // 80 + 1):
+        log.append(shuffled.iloc[start:start + len(shuffled) // 80 + 1])
+    assert len(log.index) == len(events)
+    assert_same_tables(log.index, events)
+
+    reopened = EventLog(str(tmp_path))
+    assert_same_tables(reopened.index, events)
+    run_events = reopened.index.run_events(300)
+    assert (run_events['Run'] == 300).all()
+    assert run_events['Minute'].is_monotonic_increasing
+    assert len(run_events) == (events['Run'] == 300).sum()
+
+
+def test_ingest_reads_only_new_lines(tmp_path, events):
+    path = tmp_path / 'stats.events.csv'
+    first, second = events.iloc[:1000], events.iloc[1000:]
+    first.to_csv(path, index=False)
+    log = EventLog(str(tmp_path / 'log'))
+    log.ingest(str(path))
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        second.to_csv(f, index=False, header=False)
+    log.ingest(str(path))
+    assert len(log.index) == len(events)
+    assert_same_tables(log.index, events)
+
+
+def test_days_without_logged_runs_draw_nothing(tmp_path, raw, events):
+    stats = StatsIndex(typed_runs(raw))
+    # The log only starts on the last day
+    log = EventLog(str(tmp_path))
+    log.append(events[events['Run'] > 450])
+
+    assert log.index.milestone_distribution(ACHIEVEMENTS, runs=[1, 2]).empty
+    assert log.index.survival(runs=[1, 2]).empty
+    assert build_survival(log.index, stats, stats.days[0]) == (None, {})
+    assert build_milestone_times(log.index, stats, stats.days[0]) == (None, {})
+    fig, _ = build_milestone_times(log.index, stats, stats.days[-1])
+    assert fig is not None
@@ -0,0 +1,125 @@
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregates
+from aggregates import StatsIndex
+from benchmark import ACHIEVEMENTS, PLAYERS, generate_runs
+from charts import build_deaths, build_time_lost
+from filters import RunFilter
+from loader import DURATION, load_runs, typed_runs
+
+STATS = os.path.join(os.path.dirname(__file__), os.pardir, 'stats.ods')
+
+
+@pytest.fixture(scope='module')
+def stats():
+    return StatsIndex(typed_runs(generate_runs(3000, runs_per_day=100)))
+
+
+def boolean_mask(runs, run_filter):
+    """The same filter as chained boolean masks over the full frame"""
+    mask = np.ones(len(runs), dtype=bool)
+    if run_filter.days is not None:
+        low, high = run_filter.days
+        mask &= runs['Day'].between(low, high).to_numpy()
+    if run_filter.duration is not None:
+        low, high = run_filter.duration
+        mask &= runs[DURATION].between(low if low is not None else -np.inf, high if high is not None else np.inf).to_numpy()
+    if run_filter.players is not None:
+        mask &= runs['Player Death'].isin(run_filter.players).to_numpy()
+    if run_filter.causes is not None:
+        mask &= runs['Cause of Death'].isin(run_filter.causes).to_numpy()
+    for name in run_filter.achievements or ():
+        bit = runs.attrs['achievements'].index(name)
+        mask &= (runs['Achievements'].to_numpy() >> bit) & 1 == 1
+    return np.flatnonzero(mask)
+
+
+def random_filters(stats, count=50, seed=0):
+    rng = np.random.default_rng(seed)
+    causes = list(stats.runs['Cause of Death'].cat.categories)
+    for _ in range(count):
+        first, last = sorted(rng.choice(stats.days, 2))
+        yield RunFilter(
+            days=(first, last) if rng.random() < 0.5 else None,
+            players=list(rng.choice(PLAYERS + ['Nobody'], rng.integers(1, 3), replace=False)) if rng.random() < 0.5 else None,
+            causes=list(rng.choice(causes, 2, replace=False)) if rng.random() < 0.3 else None,
+            achievements=list(rng.choice(ACHIEVEMENTS[:4], rng.integers(1, 3), replace=False)) if rng.random() < 0.4 else None,
+            duration=(float(rng.integers(0, 60)), None if rng.random() < 0.5 else float(rng.integers(60, 300))) if rng.random() < 0.5 else None,
+        )
+
+
+def test_bitmaps_match_boolean_masks(stats):
+    index = stats.filter_index()
+    for run_filter in random_filters(stats):
+        np.testing.assert_array_equal(index.positions(run_filter), boolean_mask(stats.runs, run_filter), err_msg=repr(run_filter))
+
+
+def test_selection_matches_an_index_built_from_the_rows(stats):
+    run_filter = RunFilter(days=(3, 20), players=['Neuro', 'Vedal'], duration=(10, None))
+    selection = stats.select(run_filter)
+    expected = StatsIndex(stats.runs.iloc[boolean_mask(stats.runs, run_filter)].reset_index(drop=True))
+    assert selection.days == expected.days
+    assert selection.summary() == expected.summary()
+    pd.testing.assert_series_equal(selection.time_lost(5), expected.time_lost(5))
+    assert stats.select(RunFilter(days=(3, 20), players=['Vedal', 'Neuro'], duration=(10, None))) is selection
+    assert stats.select(RunFilter()) is stats
+
+
+def test_day_without_deaths_in_a_selection(stats):
+    # One day's runs, none of them with a recorded death
+    day = stats.days[-1]
+    runs = stats.runs.copy()
+    runs.loc[runs['Day'] == day, ['Player Death', 'Cause of Death']] = np.nan
+    sparse = StatsIndex(runs)
+
+    summary = sparse.summary(day)
+    assert summary['most_common_death'] is None and summary['most_common_death_count'] == 0
+    assert summary['players'] == 0
+    assert sparse.time_lost(day).empty
+    assert sparse.deaths(day).empty
+    assert (sparse.survival(day)['Survival'] == 1).all()
+    assert (sparse.survival(day, 'Neuro')['Survival'] == 1).all()
+    assert sparse.cause_hazards(day).shape[1] == 0
+
+
+def test_concurrent_selects(stats, monkeypatch):
+    monkeypatch.setattr(aggregates, 'MAX_SELECTIONS', 2)
+    stats = StatsIndex(stats.runs)
+    filters = [RunFilter(days=(day, day)) for day in stats.days[:6]]
+    errors = []
+
+    def select_all():
+        try:
+            for _ in range(5):
+                for run_filter in filters:
+                    assert stats.select(run_filter).days == [run_filter.days[0]]
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=select_all) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(stats._selections) <= 2
+
+
+def test_charts_for_a_sparse_day_selection(tmp_path, monkeypatch):
+    # The loader writes its cache next to the working directory
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(STATS, 'stats.ods')
+    selection = StatsIndex(load_runs('stats.ods')).select(RunFilter(achievements=['Eye Spy']))
+    for day in selection.days:
+        selection.survival(day)
+        selection.cause_hazards(day)
+        if selection.deaths(day).empty:
+            assert build_deaths(selection, day) == (None, {})
+        if selection.time_lost(day).empty:
+            assert build_time_lost(selection, day) == (None, {})
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from loader import DURATION, appended_rows, typed_runs, validate_runs
+
+
+def make_raw(**columns):
+    raw = pd.DataFrame({
+        'Run': [1, 2, 3],
+        'Day': [1, 1, 2],
+        DURATION: [5.0, 12.5, 40.0],
+        'Player Death': ['Neuro', np.nan, 'Vedal'],
+        'Cause of Death': ['Zombie', 'Fall Damage', np.nan],
+        'Achievement: Acquire Hardware': [True, False, True],
+    })
+    return raw.assign(**columns)
+
+
+def test_bad_numbers_are_dropped_and_reported():
+    runs, problems = validate_runs(make_raw(Day=[1, 'two', -1]))
+    assert runs['Run'].tolist() == [1]
+    assert [(p['Row'], p['Column'], p['Problem']) for p in problems] == [
+        (2, 'Day', 'not a number'),
+        (3, 'Day', 'negative'),
+    ]
+
+
+def test_numeric_cause_is_kept_as_text():
+    raw = make_raw(**{'Cause of Death': ['Zombie', 404.0, np.nan]})
+    _, problems = validate_runs(raw)
+    assert [(p['Row'], p['Column'], p['Problem']) for p in problems] == [
+        (2, 'Cause of Death', 'not text, read as text'),
+    ]
+    runs = typed_runs(raw)
+    assert runs['Cause of Death'].tolist()[:2] == ['Zombie', '404']
+    assert list(runs['Cause of Death'].cat.categories) == ['404', 'Zombie']
+
+
+def test_all_numeric_player_column_is_categorized():
+    runs = typed_runs(make_raw(**{'Player Death': [1, 2, np.nan]}))
+    assert runs['Player Death'].tolist()[:2] == ['1', '2']
+    assert pd.isna(runs['Player Death'].iloc[2])
+
+
+def test_appended_rows_need_increasing_run_numbers():
+    current = typed_runs(make_raw())
+    assert appended_rows(current.iloc[:1], current)['Run'].tolist() == [2, 3]
+    for numbers in ([1, 3, 2], [1, 2, 2], [1, 1, 2]):
+        current = typed_runs(make_raw(Run=numbers))
+        assert appended_rows(current.iloc[:1], current) is None
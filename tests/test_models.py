@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from loader import DURATION, typed_runs
+from models import ALL_DAYS, AchievementTiming
+
+ACHIEVEMENTS = ['Acquire Hardware', 'We Need to Go Deeper', 'A Terrible Fortress']
+
+
+def make_runs(rows=200, seed=1, reach=(0.6, 0.3, 0.1)):
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame({
+        'Run': np.arange(1, rows + 1),
+        'Day': np.sort(rng.integers(1, 5, rows)),
+        DURATION: rng.integers(1, 300, rows).astype(float),
+        'Player Death': rng.choice(['Neuro', 'Vedal'], rows),
+        'Cause of Death': rng.choice(['Zombie', 'Lava'], rows),
+    })
+    for name, chance in zip(ACHIEVEMENTS, reach):
+        raw[f'Achievement: {name}'] = rng.random(rows) < chance
+    return typed_runs(raw)
+
+
+def test_statistics_match_a_direct_groupby():
+    runs = make_runs()
+    timing = AchievementTiming(runs, ACHIEVEMENTS)
+    for day in [None, 2]:
+        day_runs = runs if day is None else runs[runs['Day'] == day]
+        table = timing.achievements_for(day)
+        for name in table.index:
+            bit = ACHIEVEMENTS.index(name)
+            reached = (day_runs['Achievements'].to_numpy() >> bit) & 1 == 1
+            durations = day_runs[DURATION][reached].astype(float)
+            row = table.loc[name]
+            assert row['Count'] == len(durations)
+            assert np.isclose(row['Mean'], durations.mean())
+            assert np.isclose(row['Median'], durations.median())
+            if len(durations) > 1:
+                assert row['CI Low'] <= row['Mean'] <= row['CI High']
+
+        slope, intercept, r2 = timing.fit(day)
+        expected_slope, expected_intercept = np.polyfit(np.arange(len(table)), table['Mean'], 1)
+        assert np.isclose(slope, expected_slope) and np.isclose(intercept, expected_intercept)
+
+
+def test_no_achievements_reached_gives_no_fit():
+    runs = make_runs(reach=(0, 0, 0))
+    timing = AchievementTiming(runs, ACHIEVEMENTS)
+    assert timing.table.empty
+    assert list(timing.table.columns) == ['Count', 'Mean', 'Q25', 'Median', 'Q75', 'CI Low', 'CI High']
+    assert timing.fit() is None
+    assert timing.fit(1) is None
+    assert timing.achievements_for(1).empty
+
+
+def test_single_achievement_gives_no_fit():
+    timing = AchievementTiming(make_runs(reach=(0.5, 0, 0)), ACHIEVEMENTS)
+    assert len(timing.achievements_for(None)) == 1
+    assert timing.fit() is None
+    assert ALL_DAYS in timing.table.index.get_level_values(0)
@@ -0,0 +1,50 @@
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import loader
+from loader import DURATION, load_runs
+from ods_reader import iter_batches, read_sheet
+
+STATS = os.path.join(os.path.dirname(__file__), os.pardir, 'stats.ods')
+
+
+def write_ods(path, frame):
+    frame.to_excel(path, engine='odf', index=False)
+    return str(path)
+
+
+def sheet(rows=6, **columns):
+    frame = pd.DataFrame({
+        'Run': np.arange(1, rows + 1),
+        'Day': np.repeat([1, 2], rows // 2),
+        DURATION: np.linspace(3, 60, rows).round(1),
+        'Player Death': ['Neuro', 'Vedal'] * (rows // 2),
+        'Cause of Death': ['Zombie', 'Skeleton'] * (rows // 2),
+        'Achievement: Acquire Hardware': [True, False] * (rows // 2),
+    })
+    return frame.assign(**columns)
+
+
+def test_streaming_reader_matches_read_excel():
+    pd.testing.assert_frame_equal(read_sheet(STATS), pd.read_excel(STATS, engine='odf'))
+
+
+def test_batches_add_up_to_the_whole_sheet():
+    batches = list(iter_batches(STATS, batch_size=10))
+    assert len(batches) > 1
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), read_sheet(STATS))
+
+
+@pytest.mark.parametrize('batch_size', [2, 1000])
+def test_mixed_free_text_column_is_cached_as_text(tmp_path, monkeypatch, batch_size):
+    # Numbers above text: within one batch, or across batches
+    monkeypatch.setattr(loader, 'iter_batches', functools.partial(iter_batches, batch_size=batch_size))
+    path = write_ods(tmp_path / 'stats.ods', sheet(Notes=[5, 6, 'text', None, 7, 'more']))
+    runs = load_runs(path, cache_dir=str(tmp_path / 'cache'))
+    assert runs['Notes'].tolist()[:3] == ['5', '6', 'text']
+    # Second load comes from the cache
+    pd.testing.assert_frame_equal(load_runs(path, cache_dir=str(tmp_path / 'cache')), runs)
@@ -0,0 +1,21 @@
+import tracemalloc
+
+from profiling import SectionProfiler
+
+
+def test_memory_tracing_runs_while_any_session_wants_it():
+    assert not tracemalloc.is_tracing()
+    SectionProfiler(trace_memory=True, session='a')
+    SectionProfiler(trace_memory=True, session='b')
+
+    # A rerun without tracing must not stop it under another session's section
+    profiler = SectionProfiler(trace_memory=True, session='a')
+    profiler.start("Section")
+    SectionProfiler(trace_memory=False, session='c')
+    SectionProfiler(trace_memory=False, session='b')
+    assert tracemalloc.is_tracing()
+    profiler.finish()
+    assert 'peak_kb' in profiler.records[0]
+
+    SectionProfiler(trace_memory=False, session='a')
+    assert not tracemalloc.is_tracing()
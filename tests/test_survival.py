@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from survival import Z_95, cumulative_hazards, exit_counts, kaplan_meier, survival_at
+
+# Durations and whether each run ended in a death (0 = censored)
+DURATIONS = [1, 2, 2, 3, 4, 5]
+DIED = [1, 1, 0, 1, 0, 1]
+
+
+def test_kaplan_meier_by_hand():
+    exits = exit_counts(DURATIONS, DIED)
+    curve = kaplan_meier(exits['Exits'], exits['Deaths'])
+    assert curve['Duration'].tolist() == [1, 2, 3, 4, 5]
+    assert curve['At Risk'].tolist() == [6, 5, 3, 2, 1]
+    assert curve['Deaths'].tolist() == [1, 1, 1, 0, 1]
+    np.testing.assert_allclose(curve['Survival'], [5 / 6, 2 / 3, 4 / 9, 4 / 9, 0])
+
+    # Greenwood's variance on the log(-log S) scale, at t = 3
+    survival = 4 / 9
+    greenwood = 1 / (6 * 5) + 1 / (5 * 4) + 1 / (3 * 2)
+    spread = Z_95 * np.sqrt(greenwood) / abs(np.log(survival))
+    row = curve.iloc[2]
+    assert np.isclose(row['Lower'], survival ** np.exp(spread))
+    assert np.isclose(row['Upper'], survival ** np.exp(-spread))
+    assert (curve['Lower'] <= curve['Survival']).all() and (curve['Survival'] <= curve['Upper']).all()
+    # Nobody left: no band
+    assert curve.iloc[-1][['Lower', 'Upper']].tolist() == [0, 0]
+
+
+def test_survival_at_reads_the_step_curve():
+    exits = exit_counts(DURATIONS, DIED)
+    curve = kaplan_meier(exits['Exits'], exits['Deaths'])
+    np.testing.assert_allclose(survival_at(curve, [0, 1, 1.5, 3, 10]), [1, 5 / 6, 5 / 6, 4 / 9, 0])
+
+
+def test_no_deaths_means_everyone_survives():
+    exits = exit_counts([3, 1, 2], [0, 0, 0])
+    curve = kaplan_meier(exits['Exits'], exits['Deaths'])
+    assert (curve['Survival'] == 1).all()
+    assert (curve['Lower'] == 1).all() and (curve['Upper'] == 1).all()
+
+
+def test_empty_input_gives_an_empty_curve():
+    exits = exit_counts([], [])
+    curve = kaplan_meier(exits['Exits'], exits['Deaths'])
+    assert curve.empty
+    assert list(curve.columns) == ['Duration', 'At Risk', 'Deaths', 'Survival', 'Lower', 'Upper']
+    assert survival_at(curve, 10) == 1
+
+
+def test_cause_hazards_add_up_to_the_overall_hazard():
+    exits = exit_counts(DURATIONS, DIED)
+    causes = pd.Series(
+        [1, 1, 1, 1],
+        index=pd.MultiIndex.from_tuples(
+            [('Zombie', 1.0), ('Lava', 2.0), ('Zombie', 3.0), ('Lava', 5.0)], names=['Cause', 'Duration']
+        ),
+    )
+    hazards = cumulative_hazards(exits['Exits'], causes)
+    np.testing.assert_allclose(hazards['Zombie'], [1 / 6, 1 / 6, 1 / 6 + 1 / 3, 1 / 6 + 1 / 3, 1 / 6 + 1 / 3])
+    overall = np.cumsum(exits['Deaths'].to_numpy() / np.array([6, 5, 3, 2, 1]))
+    np.testing.assert_allclose(hazards.sum(axis=1), overall)
@@ -0,0 +1,72 @@
+"""Background polling watcher for data files.
+
+Polling a single os.stat() per interval is cheap and works the same on every
+platform and on network or container filesystems where inotify is unreliable.
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _stat_key(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        # Editors often save by replacing the file; treat the gap as "still changing"
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+class FileWatcher:
+    """Calls `on_change()` from a daemon thread once per settled change to `path`.
+
+    A change is only reported after the file has stayed the same for `debounce`
+    seconds, so a save that writes the file in several steps triggers one call.
+    """
+
+    def __init__(self, path, on_change, interval=1.0, debounce=0.5):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"watch:{self.path}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        last_key = _stat_key(self.path)
+        while not self._stop.wait(self.interval):
+            key = _stat_key(self.path)
+            if key == last_key:
+                continue
+
+            # Wait for the file to settle before reporting the change
+            settled_at = time.monotonic()
+            while not self._stop.wait(min(self.debounce, self.interval)):
+                newer = _stat_key(self.path)
+                if newer != key:
+                    key, settled_at = newer, time.monotonic()
+                elif time.monotonic() - settled_at >= self.debounce:
+                    break
+            if self._stop.is_set() or key is None:
+                continue
+
+            last_key = key
+            try:
+                self.on_change()
+            except Exception:
+                logger.exception("Refreshing %s failed", self.path)